@@ -27,26 +27,24 @@ def bit_indexes(bint:int) -> list:
 
     if bint < 0: return None  # error
     
-    bit_idx = []
-    while bint > 0:
-        index = logar2(bint)
-        bint &= (1<<index) - 1
-        bit_idx.insert(0, index)
+    # one pass over the bin() string, linear in bit length rather than
+    # a log2 plus mask per set bit, quadratic on wide masks.  Mask driven
+    # aggregates, ListStore.count/sum/min/max/group_by, walk every mask
+    # through here.
+    bstr = bin(bint)
+    top = len(bstr) - 1
     
-    return bit_idx
+    return [ top - i for i in range(top, 1, -1) if bstr[i] == '1' ]
 
 def bit_count(bint:int) -> int:
     """Count number of bits set in a binary integer.
-       bin(x).count('1') works for x >= 0. """
+       bin(x).count('1') works for x >= 0, one C level pass, where
+       clearing the low bit per set bit is quadratic on wide masks.
+       ListStore.count(mask) is this popcount. """
     
     if bint < 0: return None  # error
 
-    count = 0
-    while bint > 0:
-        bint &= bint - 1
-        count += 1
-        
-    return count
+    return bin(bint).count('1')
     
 def one_bit_set(bint:int):
     """Only one bit set in bint. 
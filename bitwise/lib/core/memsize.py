@@ -0,0 +1,71 @@
+"""Object size estimates for memory reports, python/micropython.
+
+On CPython, sizes are sys.getsizeof.  MicroPython has no getsizeof, sizes
+are estimated from object layouts on 32 bit ports ( Pico, ESP32 ), rounded
+up to 16 byte GC blocks.  Small ints ( 31 bit ), None and bools live in
+the object pointer and cost nothing.  Check against gc.mem_free() deltas.
+"""
+
+try:
+    from sys import getsizeof
+except ImportError:   # micropython
+    getsizeof = None
+
+try:
+    from lib.core.bitops import bit_length
+except ImportError:
+    from core.bitops import bit_length
+
+
+MPY_BLOCK = 16   # GC allocation unit, bytes
+
+def _blocks(nbytes: int) -> int:
+
+    return (nbytes + MPY_BLOCK - 1) // MPY_BLOCK * MPY_BLOCK
+
+def mpy_sizeof(obj) -> int:
+    """Estimated bytes of one MicroPython object, not its contents."""
+
+    if obj is None or obj is True or obj is False:
+        return 0
+
+    if isinstance(obj, int):
+        if -(1 << 30) <= obj < (1 << 30):
+            return 0   # small int
+        return _blocks(12 + 2 * ((bit_length(abs(obj)) + 15) // 16))   # mpz, 16 bit digits
+
+    if isinstance(obj, float):
+        return _blocks(8)
+
+    if isinstance(obj, (str, bytes)):
+        return _blocks(12 + len(obj) + 1)
+
+    if isinstance(obj, tuple):
+        return _blocks(8 + 4 * len(obj))
+
+    if isinstance(obj, list):
+        return _blocks(16) + _blocks(4 * len(obj))   # object + item array
+
+    if isinstance(obj, (dict, set, frozenset)):
+        return _blocks(16) + _blocks(8 * (len(obj) + len(obj) // 2 + 1))   # map, part empty
+
+    return _blocks(16)
+
+sizeof = getsizeof if getsizeof else mpy_sizeof
+
+def values_size(values) -> int:
+    """Bytes of a container plus its distinct element objects, for ex. a
+       column list.  Objects repeated in the container are counted once."""
+
+    total = sizeof(values)
+
+    if hasattr(values, 'nbytes'):   # array, elements are in the buffer
+        return total
+
+    seen = set()
+    for v in values:
+        if id(v) not in seen:
+            seen.add(id(v))
+            total += sizeof(v)
+
+    return total
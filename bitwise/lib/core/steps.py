@@ -0,0 +1,58 @@
+"""Cooperative stepping of chunked generators, for ex. ListStore iwhere,
+ireindex, ifind_all, idump, under a per-step time budget, python/micropython.
+
+An IO loop can run a long scan a slice at a time:
+
+    scan = ls.ireindex()
+    done, last = False, None
+    while not done:
+        done, last = run_steps(scan, 5, last)   # at most ~5 ms
+        engine.run_cycle()
+
+or, with asyncio, await run_steps_async(ls.iwhere('temp', 'gt', 30.0)).
+"""
+
+try:
+    from time import ticks_ms, ticks_diff   # micropython
+except ImportError:
+    from time import monotonic_ns
+
+    def ticks_ms() -> int:
+        return monotonic_ns() // 1000000
+
+    def ticks_diff(a: int, b: int) -> int:
+        return a - b
+
+
+def run_steps(steps, budget_ms: int = 10, last=None) -> tuple:
+    """Advance generator steps until budget_ms is used up or steps is
+       exhausted.  Returns (done, last value yielded), last is passed back
+       in on the next call so the final value isn't lost.  At least one
+       step is taken, a step may overrun the budget by one chunk."""
+
+    start = ticks_ms()
+
+    for last in steps:
+        if ticks_diff(ticks_ms(), start) >= budget_ms:
+            return False, last
+
+    return True, last
+
+
+async def run_steps_async(steps, budget_ms: int = 10):
+    """Coroutine, run steps to the end, giving the event loop a turn after
+       each budget_ms slice.  Returns the last value yielded."""
+
+    try:
+        import asyncio
+    except ImportError:
+        import uasyncio as asyncio
+
+    done, last = False, None
+
+    while not done:
+        done, last = run_steps(steps, budget_ms, last)
+        if not done:
+            await asyncio.sleep(0)
+
+    return last
@@ -0,0 +1,280 @@
+"""
+module:     dbquery
+version:    v0.4.4
+sourcecode: https://github.com/billbreit/BitWiseApps
+copyleft:   2024 by Bill Breitmayer
+licence:    GNU GPL v3 or above
+author:     Bill Breitmayer
+
+dbquery - small query layer over DataStore tables, select, where and join
+    along the declared RelationDefs, with projections and aggregates.
+
+Each table in a query keeps a row mask, where() ANDs in TupleStore.where
+masks, so filters are done before any join.  Joins run join.join_slots on
+the filtered masks, index nested loop if the right column is indexed, else
+a hash join, and results are tuples of slots.  Rows are only read from the
+columns at select(), no namedtuples in between.
+
+Columns are 'Table.column', or just 'column' for the first table in the
+query having it.
+
+q = db.query('Member').not_exists('ProjectMember')
+q.values('name')                                   # inactive members
+
+q = db.query('Project').join('ProjectResource').where('amount', 'gt', 100.0)
+q.select('Project.projname', 'resource', 'amount')
+q.group_by('projname', 'sum', 'amount')
+
+exists/not_exists ( semi and anti join ) take a table name or a one table
+query, db.query('ProjectMember').where('projrole', 'eq', 'helper').
+"""
+
+try:
+    from core.bitops import bit_indexes
+except ImportError:
+    from lib.core.bitops import bit_indexes
+
+try:
+    from join import join_slots
+except ImportError:
+    from lib.join import join_slots
+
+
+class QueryError(Exception):
+    pass
+
+
+AGGREGATES = ('count', 'sum', 'min', 'max', 'mean')
+
+
+class Query(object):
+    """Query on a DataStore, built up by method chaining, run by select,
+       values, count, aggregate and group_by.  From db.query(tname)."""
+
+    def __init__(self, db:'DataStore', tname:str ):
+
+        self.db = db
+        self._tables:list[str] = []     # in join order, first is base
+        self._masks:dict = {}           # tname -> row mask, None for all rows
+        self._joins:list[tuple] = []    # ( left tname, left col, tname, col )
+
+        self._add_table(tname)
+
+    def _add_table(self, tname:str ):
+
+        if tname not in self.db.tabledict:
+            raise QueryError(f"Query: table '{tname}' not in {self.db.dbname}.")
+
+        if tname in self._masks:
+            raise QueryError(f"Query: table '{tname}' already in query.")
+
+        self._tables.append(tname)
+        self._masks[tname] = None
+
+    def _resolve(self, col:str ) -> tuple:
+        """( tname, column name ) for 'Table.column' or 'column'."""
+
+        if '.' in col:
+            tname, cname = col.split('.', 1)
+            if tname not in self._masks:
+                raise QueryError(f"Query: table '{tname}' not in query.")
+            if cname not in self.db.table(tname).column_names:
+                raise QueryError(f"Query: column '{cname}' not in {tname}.")
+            return tname, cname
+
+        for tname in self._tables:
+            if col in self.db.table(tname).column_names:
+                return tname, col
+
+        raise QueryError(f"Query: column '{col}' not in {self._tables}.")
+
+    def _mask(self, tname:str ) -> int:
+
+        m = self._masks[tname]
+
+        return (1 << self.db.table(tname).length) - 1 if m is None else m
+
+    def _and_mask(self, tname:str, mask:int ):
+
+        m = self._masks[tname]
+        self._masks[tname] = mask if m is None else m & mask
+
+    """ Building, each returns the query """
+
+    def where(self, col:str, op:str, *args ) -> 'Query':
+        """Filter rows of the column's table, op as for TupleStore.where."""
+
+        tname, cname = self._resolve(col)
+        self._and_mask(tname, self.db.table(tname).where(cname, op, *args))
+
+        return self
+
+    def _relation(self, tname:str, via:str=None ) -> tuple:
+        """( left tname, left col, col ) of the relation between tname and
+           a table in the query, latest joined first, or via."""
+
+        candidates = [via] if via else list(reversed(self._tables))
+
+        for left in candidates:
+            for r in self.db.relations:
+                if r.parent == left and r.child == tname:
+                    return left, r.pcol, r.ccol
+                if r.child == left and r.parent == tname:
+                    return left, r.ccol, r.pcol
+
+        raise QueryError(f"Query: no relation between '{tname}' and {candidates}.")
+
+    def join(self, tname:str, via:str=None ) -> 'Query':
+        """Inner join tname along a declared relation, parent to child or
+           child to parent, with via or the latest joined table related."""
+
+        left, lcol, col = self._relation(tname, via)
+        self._add_table(tname)
+        self._joins.append((left, lcol, tname, col))
+
+        return self
+
+    def _semi(self, other, keep:bool ) -> 'Query':
+
+        if isinstance(other, Query):
+            if other._joins:
+                raise QueryError('Query: exists needs a one table query.')
+            tname, omask = other._tables[0], other._mask(other._tables[0])
+        else:
+            tname, omask = other, None
+
+        left, lcol, col = self._relation(tname)
+        otable = self.db.table(tname)
+
+        if omask is None:
+            values = set(otable.get_column(col))
+        else:
+            values = set(otable.masked_values(col, omask))
+
+        op = 'in' if keep else 'notin'
+        self._and_mask(left, self.db.table(left).where(lcol, op, values))
+
+        return self
+
+    def exists(self, other ) -> 'Query':
+        """Keep rows with a related row in other, a table name or a one
+           table query.  Other is not joined, no rows multiplied."""
+
+        return self._semi(other, True)
+
+    def not_exists(self, other ) -> 'Query':
+        """Keep rows without a related row in other."""
+
+        return self._semi(other, False)
+
+    """ Running """
+
+    def mask(self, tname:str=None ) -> int:
+        """Row mask for one table after where/exists, before joins."""
+
+        return self._mask(tname or self._tables[0])
+
+    def rows(self) -> list[tuple]:
+        """Result rows as tuples of slots, one per table in join order."""
+
+        result = [ (slot,) for slot in bit_indexes(self._mask(self._tables[0])) ]
+
+        for left, lcol, tname, col in self._joins:
+            li = self._tables.index(left)
+            lmask = 0
+            for row in result:
+                lmask |= 1 << row[li]
+            matches = {}
+            for ls, rs in join_slots(self.db.table(left), lcol, self.db.table(tname), col,
+                                     lmask=lmask, rmask=self._mask(tname)):
+                matches.setdefault(ls, []).append(rs)
+            result = [ row + (slot,) for row in result
+                                     for slot in matches.get(row[li], ()) ]
+
+        return result
+
+    def _columns(self, cols:list ) -> list[tuple]:
+        """( position in row, column list ) per col."""
+
+        out = []
+        for col in cols:
+            tname, cname = self._resolve(col)
+            out.append((self._tables.index(tname), self.db.table(tname).get_column(cname)))
+
+        return out
+
+    def select(self, *cols ) -> list[tuple]:
+        """Tuples of values for cols, all columns of all tables if none."""
+
+        if not cols:
+            cols = [ tname + '.' + c for tname in self._tables
+                     for c in self.db.table(tname).column_names ]
+
+        columns = self._columns(cols)
+
+        return [ tuple([ column[row[pos]] for pos, column in columns ])
+                 for row in self.rows() ]
+
+    def values(self, col:str ) -> list:
+        """Values of one column, in result order."""
+
+        (pos, column), = self._columns([col])
+
+        return [ column[row[pos]] for row in self.rows() ]
+
+    def count(self) -> int:
+
+        if not self._joins:
+            return self.db.table(self._tables[0]).count(self._mask(self._tables[0]))
+
+        return len(self.rows())
+
+    @staticmethod
+    def _aggregate(agg:str, values:list ):
+
+        if agg == 'count':
+            return len(values)
+        if len(values) == 0:
+            return None if agg != 'sum' else 0
+        if agg == 'sum':
+            return sum(values)
+        if agg == 'min':
+            return min(values)
+        if agg == 'max':
+            return max(values)
+
+        return sum(values) / len(values)   # mean
+
+    def aggregate(self, agg:str, col:str=None ):
+        """One of count, sum, min, max or mean of col over result rows."""
+
+        if agg not in AGGREGATES:
+            raise QueryError(f"Query: unknown aggregate '{agg}'.")
+
+        if agg == 'count':
+            return self.count()
+
+        return self._aggregate(agg, self.values(col))
+
+    def group_by(self, col:str, agg:str='count', agg_col:str=None ) -> dict:
+        """Dict of col value -> aggregate of agg_col over each group.  With
+           no joins, runs as TupleStore.group_by, on index masks if indexed."""
+
+        if agg not in AGGREGATES:
+            raise QueryError(f"Query: unknown aggregate '{agg}'.")
+
+        if not self._joins:
+            tname, cname = self._resolve(col)
+            acol = self._resolve(agg_col)[1] if agg_col else None
+            return self.db.table(tname).group_by(cname, self._mask(tname), agg, acol)
+
+        (kpos, kcolumn), = self._columns([col])
+        if agg_col:
+            (apos, acolumn), = self._columns([agg_col])
+
+        groups = {}
+        for row in self.rows():
+            groups.setdefault(kcolumn[row[kpos]], []).append(
+                                    acolumn[row[apos]] if agg_col else None)
+
+        return { k: self._aggregate(agg, v) for k, v in groups.items() }
@@ -16,6 +16,11 @@ try:
 except ImportError:
     from lib.core.bitops import power2, bit_indexes, bit_remove
 
+try:
+    from core.memsize import sizeof
+except ImportError:
+    from lib.core.memsize import sizeof
+
 class IndexerError(Exception):
     pass
 
@@ -108,6 +113,20 @@ class Indexer(object):
         del self.index[attr_name]
         self._indexed.remove(attr_name)
 
+    def memory_report(self) -> dict:
+        """Estimated bytes per indexed column, { col: { 'masks': n, 'bytes': b } },
+           the subdict and its int masks.  Value keys are the same objects
+           as in the store column, not counted again.  A mask costs about
+           one bit per row, so a column with many distinct values costs
+           rows x values bits, a poor candidate for indexing."""
+
+        report = {}
+        for attr_name, sub_dict in self._index.items():
+            report[attr_name] = { 'masks': len(sub_dict),
+                                  'bytes': sizeof(sub_dict) + sum([ sizeof(m) for m in sub_dict.values() ]) }
+
+        return report
+
     def update_index(self, attr_name: str, row_slot: int, old_value, new_value):
         """An altered row via set().  Need to unset bit on old value and
         set bit for new value."""
@@ -115,28 +134,30 @@ class Indexer(object):
         if attr_name not in self._indexed:
             return
 
-        # NOTAND old value
-        self.index[attr_name][old_value] &= ~power2(row_slot)
+        # NOTAND old value, not in index if not indexable
+        if type(old_value) in self._indexable and old_value in self.index[attr_name]:
+            self.index[attr_name][old_value] &= ~power2(row_slot)
 
-        if self.index[attr_name][old_value] == 0:
-            del self.index[attr_name][old_value]
+            if self.index[attr_name][old_value] == 0:
+                del self.index[attr_name][old_value]
 
-        # If value is new, init mask
+        # If value is new, init mask, then OR new value
         if type(new_value) in self._indexable:
             if new_value not in self.index[attr_name].keys():
                 self.index[attr_name][new_value] = 0
 
-        # OR new value
-        self.index[attr_name][new_value] |= power2(row_slot)
+            self.index[attr_name][new_value] |= power2(row_slot)
 
 
-    def append_index(self, list_in: list):
-        """New slot value, for appended row. No need to rebuild masks, just OR in new offset."""
+    def append_index(self, list_in: list, new_slot: int = None):
+        """New slot value, for appended row. No need to rebuild masks, just OR in new offset.
+           Called after the row is appended to the store, so new slot is the last slot."""
 
         for col_name in self._index.keys():
 
             store_slot = self._slots.index(col_name)
-            new_slot = len(self._store[store_slot])  # current new slot
+            if new_slot is None:
+                new_slot = len(self._store[store_slot]) - 1  # current new slot
 
             if list_in[store_slot] not in self._index[col_name]:
                 self._index[col_name][list_in[store_slot]] = 0
@@ -144,10 +165,12 @@ class Indexer(object):
             self._index[col_name][list_in[store_slot]] |= power2(new_slot)
 
     def extend_index(self, list_of_lists: list[list]):
-        """Use append index for multiple new values"""
+        """Use append index for multiple new values, already extended into store."""
+
+        first_slot = len(self._store[0]) - len(list_of_lists)
 
-        for ls in list_of_lists:
-            self.append_index(ls)
+        for i, ls in enumerate(list_of_lists):
+            self.append_index(ls, first_slot + i)
 
     def pop_index(self, row_slot: int):
         """Delete one bit from masks in each subdict for indexed attr names.
@@ -164,6 +187,42 @@ class Indexer(object):
         for attr_name in self._indexed:
             self.index_attr(attr_name)
 
+    def iindex_attr(self, attr_name: str, chunk_size: int = 256):
+        """Chunked index_attr, yields the number of rows done after each
+           chunk.  The new subdict replaces the old one when the column is
+           done, queries in between see the old index.  Rows appended during
+           the scan are picked up, other changes need another pass."""
+
+        if attr_name not in self._slots:
+            raise IndexerError("Index Attr: Column ", attr_name, " not known.")
+
+        column = self._store[self._slots.index(attr_name)]
+        sub_dict = {}
+        start = 0
+
+        while start < len(column):
+            end = min(start + chunk_size, len(column))
+            chunk = {}   # small masks, shifted into place once per chunk
+            bit = 1
+            for value in column[start:end]:
+                if type(value) in self._indexable:
+                    chunk[value] = chunk.get(value, 0) | bit
+                bit <<= 1
+            for value, cmask in chunk.items():
+                sub_dict[value] = sub_dict.get(value, 0) | (cmask << start)
+            start = end
+            yield start
+
+        self._index[attr_name] = sub_dict
+        if attr_name not in self._indexed:
+            self._indexed.append(attr_name)
+
+    def ireindex(self, chunk_size: int = 256):
+        """Chunked reindex, yields rows done in the current column."""
+
+        for attr_name in list(self._indexed):
+            yield from self.iindex_attr(attr_name, chunk_size)
+
     def reset(self):
         """Clear all indexes."""
 
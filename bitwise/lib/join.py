@@ -0,0 +1,181 @@
+"""
+module:     join
+version:    v0.4.4
+sourcecode: https://github.com/billbreit/BitWiseApps
+copyleft:   2024 by Bill Breitmayer
+licence:    GNU GPL v3 or above
+author:     Bill Breitmayer
+
+Joins between two ListStores, TupleStores or TableStores on a column
+from each side, without nested find_all() loops.
+
+ - index nested loop: if the inner (right) column is indexed, each left
+   value is one dict lookup in the Indexer masks.
+ - hash join: otherwise a dict of value -> slots is built once, on the
+   smaller side for an inner join, on the right side for a left join.
+
+Both stream results, as slot pairs, row pairs or projected namedtuples.
+Optional masks restrict either side, for ex. a where() or index mask.
+
+for mem, proj in join(db.Member, 'name', db.ProjectMember, 'member'):
+    ...
+
+join(mems, 'name', projmems, 'member', how='left',
+     project=['name', 'email', 'projname'])  -> Joined(name=.., email=.., projname=..)
+
+Unhashable values, lists and dicts, never match.
+"""
+
+from collections import namedtuple
+
+try:
+    from lib.core.bitops import bit_indexes
+except ImportError:
+    from core.bitops import bit_indexes
+
+
+class JoinError(Exception):
+    pass
+
+
+def _slots(store, mask: int = None):
+
+    return range(store.length) if mask is None else bit_indexes(mask)
+
+
+def _hash_slots(column: list, slots) -> dict:
+    """value -> list of slots, for the build side of a hash join."""
+
+    table = {}
+    for s in slots:
+        try:
+            table.setdefault(column[s], []).append(s)
+        except TypeError:   # unhashable, can't match
+            pass
+
+    return table
+
+
+def _indexable(store) -> tuple:
+    """Types the store's Indexer puts in index masks."""
+
+    ix = store.indexer or getattr(store, '_index_cls', None)
+
+    return tuple(ix._indexable) if ix else ()
+
+
+def join_slots(left, lcol: str, right, rcol: str, how: str = 'inner',
+               lmask: int = None, rmask: int = None):
+    """Yield (left slot, right slot) pairs for matching values, right slot
+       is None for an unmatched left row in a left join."""
+
+    if how not in ('inner', 'left'):
+        raise JoinError(f"Join: how must be 'inner' or 'left', not '{how}'.")
+
+    lcolumn = left.get_column(lcol)
+    rcolumn = right.get_column(rcol)
+
+    # index nested loop, reuse inner side index masks
+    rgroups = right._index_groups(rcol)
+
+    if rgroups is not None:
+        indexable = _indexable(right)
+        table = None   # for values the Indexer doesn't index, floats etc.
+        for ls in _slots(left, lmask):
+            value = lcolumn[ls]
+            if type(value) in indexable:
+                m = rgroups.get(value, 0)
+                if rmask is not None:
+                    m &= rmask
+                matches = bit_indexes(m) if m else ()
+            else:
+                if table is None:
+                    table = _hash_slots(rcolumn, _slots(right, rmask))
+                try:
+                    matches = table.get(value, ())
+                except TypeError:
+                    matches = ()
+            for rs in matches:
+                yield (ls, rs)
+            if how == 'left' and not matches:
+                yield (ls, None)
+        return
+
+    lslots = _slots(left, lmask)
+    rslots = _slots(right, rmask)
+
+    # hash join, build on right, probe with left, keeps left order
+    if how == 'left' or len(rslots) <= len(lslots):
+        table = _hash_slots(rcolumn, rslots)
+        for ls in lslots:
+            try:
+                matches = table.get(lcolumn[ls], ())
+            except TypeError:
+                matches = ()
+            for rs in matches:
+                yield (ls, rs)
+            if how == 'left' and not matches:
+                yield (ls, None)
+        return
+
+    # inner join, left is smaller, build on left, probe with right
+    table = _hash_slots(lcolumn, lslots)
+    for rs in rslots:
+        try:
+            matches = table.get(rcolumn[rs], ())
+        except TypeError:
+            matches = ()
+        for ls in matches:
+            yield (ls, rs)
+
+
+def _resolve_project(left, right, project: list) -> list:
+    """Map projected names to (side, column slot, field name).  Plain names
+       resolve to left first, 'left.col' or 'right.col' pick a side."""
+
+    resolved = []
+
+    for name in project:
+        if name.startswith('left.'):
+            side, col = 0, name[5:]
+        elif name.startswith('right.'):
+            side, col = 1, name[6:]
+        elif name in left.column_names:
+            side, col = 0, name
+        elif name in right.column_names:
+            side, col = 1, name
+        else:
+            raise JoinError(f"Join: projected column '{name}' not in either store.")
+
+        store = right if side else left
+        resolved.append((side, store.slot_for_col(col), name.replace('.', '_')))
+
+    return resolved
+
+
+def join(left, lcol: str, right, rcol: str, how: str = 'inner',
+         lmask: int = None, rmask: int = None, project: list = None,
+         nt_name: str = 'Joined'):
+    """Yield (left row, right row) pairs, right row None for an unmatched
+       left join row.  If project, a list of column names, yield
+       namedtuples of just those columns, read straight from the columns."""
+
+    pairs = join_slots(left, lcol, right, rcol, how, lmask, rmask)
+
+    if project is None:
+        for ls, rs in pairs:
+            yield (left.get_row(ls), None if rs is None else right.get_row(rs))
+        return
+
+    fields = _resolve_project(left, right, project)
+    factory = namedtuple(nt_name, [ f[2] for f in fields ])
+
+    # columns fetched once, not per row
+    stores = (left, right)
+    columns = [ stores[side].get_column(stores[side].column_names[ci])
+                for side, ci, _ in fields ]
+
+    for ls, rs in pairs:
+        slots = (ls, rs)
+        yield factory(*[ None if slots[side] is None else columns[i][slots[side]]
+                         for i, (side, ci, _) in enumerate(fields) ])
@@ -0,0 +1,505 @@
+"""
+module:     npstore
+version:    v0.4.4
+sourcecode: https://github.com/billbreit/BitWiseApps
+copyleft:   2024 by Bill Breitmayer
+licence:    GNU GPL v3 or above
+author:     Bill Breitmayer
+
+NumpyStore - a TupleStore for CPython servers, numeric columns are kept as
+             NumPy arrays instead of lists, other columns stay lists.
+
+Arrays are preallocated with spare capacity, doubled when full, so appends
+are amortized O(1), and store[i] is a view of the used part of the array.
+where() comparisons on an array column run vectorized, the boolean array is
+packed to an int row mask with packbits, so masks still compose with
+Indexer masks and changed masks.  sum, min, max and mean run in C.
+
+If NumPy is not installed, for ex. on micropython, dtypes are ignored and
+NumpyStore is an ordinary TupleStore, same API, same results.
+
+ns = NumpyStore('Reading', ['sensor', 'temp', 'count'],
+                dtypes={'temp': 'f8', 'count': 'i8'})
+ns.extend(readings)
+ns.mean('temp', ns.where('temp', 'gt', 30.0) & ns.index['sensor']['attic'])
+
+Values read back from array columns by get, get_row, dump etc. are plain
+Python ints and floats, get_column() returns the live array view.
+Array columns can't be indexed by Indexer, use where() masks instead, and
+snapshots aren't supported, array columns are changed in place.
+"""
+
+try:
+    from tuplestore import TupleStore, ListStoreError, SCAN_CHUNK
+except ImportError:
+    from lib.tuplestore import TupleStore, ListStoreError, SCAN_CHUNK
+
+try:
+    from lib.core.bitops import power2, bit_remove
+except ImportError:
+    from core.bitops import power2, bit_remove
+
+try:
+    from lib.core.memsize import sizeof
+except ImportError:
+    from core.memsize import sizeof
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAVE_NUMPY = np is not None
+
+# initial array capacity in rows, doubled as needed
+ARRAY_CAPACITY = 64
+
+# rows per step for vectorized scans in iwhere, much larger than SCAN_CHUNK,
+# per chunk overhead is a few ufunc calls, not a Python loop
+NP_CHUNK = 65536
+
+
+def mask_from_bools(bools) -> int:
+    """Boolean array to int row mask, element i -> bit i."""
+
+    if len(bools) == 0:
+        return 0
+
+    return int.from_bytes(np.packbits(bools, bitorder='little').tobytes(), 'little')
+
+
+def bools_from_mask(mask: int, length: int):
+    """Int row mask to boolean array of length, bits past length ignored."""
+
+    mask &= (1 << length) - 1
+    raw = np.frombuffer(mask.to_bytes((length + 7) // 8, 'little'), dtype=np.uint8)
+
+    return np.unpackbits(raw, count=length, bitorder='little').astype(bool)
+
+
+# Evaluator operators with a vectorized form, same semantics
+_vector_ops = {
+    'eq': lambda a, x: a == x,
+    'ne': lambda a, x: a != x,
+    'gt': lambda a, x: a > x,
+    'gte': lambda a, x: a >= x,
+    'lt': lambda a, x: a < x,
+    'lte': lambda a, x: a <= x,
+    'btw': lambda a, lo, hi: (a > lo) & (a < hi),
+    'btwe': lambda a, lo, hi: (a >= lo) & (a <= hi),
+    'in': lambda a, vals: np.isin(a, list(vals)),
+    'notin': lambda a, vals: ~np.isin(a, list(vals)),
+}
+
+
+class NumpyStore(TupleStore):
+    """TupleStore with NumPy array columns for numeric data, if available."""
+
+    def __init__(
+        self,
+        nt_name: str,
+        column_defs: list = None,
+        defaults: list = None,
+        dtypes: dict = None,   # col_name -> numpy dtype, for ex. 'f8', 'i4'
+    ):
+
+        super().__init__(nt_name, column_defs, defaults)
+
+        self.dtypes = dtypes or {}
+
+        # col slot -> backing array, store[slot] is a view of the used part
+        self._arrays: dict = {}
+
+        if not HAVE_NUMPY:
+            return
+
+        for col_name, dtype in self.dtypes.items():
+            ci = self.slot_for_col(col_name)
+            try:
+                self._arrays[ci] = np.zeros(ARRAY_CAPACITY, dtype=dtype)
+            except TypeError as e:
+                raise ListStoreError(f"NumpyStore: bad dtype '{dtype}' for column '{col_name}'. {e}")
+
+        self._refresh(0)
+
+    """ Arrays """
+
+    def is_array(self, col_name: str) -> bool:
+        """True if column is kept as a NumPy array."""
+
+        return self.slot_for_col(col_name) in self._arrays
+
+    def _refresh(self, length: int):
+        """Point store entries at the used part of each array, in place,
+           indexer and orderer hold a ref to the store list."""
+
+        for ci, arr in self._arrays.items():
+            self.store[ci] = arr[:length]
+
+    def _reserve(self, length: int):
+        """Grow arrays to hold length rows, at least doubling capacity."""
+
+        for ci, arr in self._arrays.items():
+            if len(arr) < length:
+                grown = np.zeros(max(length, 2 * len(arr)), dtype=arr.dtype)
+                grown[:len(arr)] = arr
+                self._arrays[ci] = grown
+
+    def _column_bytes(self, col_slot: int) -> int:
+        """Array columns, the whole backing array, spare capacity included."""
+
+        if col_slot in self._arrays:
+            return sizeof(self._arrays[col_slot])
+
+        return super()._column_bytes(col_slot)
+
+    def _pycolumns(self) -> list:
+        """Columns with arrays as Python lists, for row construction."""
+
+        return [ column.tolist() if ci in self._arrays else column
+                 for ci, column in enumerate(self.store) ]
+
+    """ Access, Python values out """
+
+    def __iter__(self):
+
+        yield from [ self.ntuple_factory(*row) for row in zip(*self._pycolumns()) ]
+
+    def dump(self):
+
+        yield from [ self.ntuple_factory(*row) for row in zip(*self._pycolumns()) ]
+
+    def get(self, slot: int, col_name: str):
+
+        value = super().get(slot, col_name)
+
+        return value.item() if self.slot_for_col(col_name) in self._arrays else value
+
+    def get_row(self, slot: int, asdict=False):
+
+        self.check_slot(slot)
+
+        row = [ column[slot].item() if ci in self._arrays else column[slot]
+                for ci, column in enumerate(self.store) ]
+
+        if asdict:
+            return dict(zip(self.column_names, row))
+
+        return self.ntuple_factory(*row)
+
+    def find(self, col_name: str, value, start=0) -> int:
+
+        ci = self.slot_for_col(col_name)
+
+        if ci not in self._arrays:
+            return super().find(col_name, value, start)
+
+        try:
+            hits = np.flatnonzero(self.store[ci][start:] == value)
+        except TypeError:
+            return -1
+
+        return int(hits[0]) + start if len(hits) > 0 else -1
+
+    def find_all(self, col_name: str, value) -> list[int]:
+
+        ci = self.slot_for_col(col_name)
+
+        if ci not in self._arrays:
+            return super().find_all(col_name, value)
+
+        try:
+            return np.flatnonzero(self.store[ci] == value).tolist()
+        except TypeError:
+            return []
+
+    """ Update """
+
+    def append(self, in_list: list = None):
+
+        if not self._arrays:
+            return super().append(in_list)
+
+        if in_list is None:
+            raise ListStoreError("Append: list passed can not be None")
+
+        if len(in_list) != len(self.store):
+            if self.defaults:
+                in_list = self.resolve_defaults(in_list)
+            else:
+                raise ListStoreError(
+                    "Append: List missing values and no defaults defined."
+                )
+
+        ilist = list(in_list)
+        slot = self.length
+
+        if self.orderer:   # before the store is changed
+            self.orderer.check_rows([ilist])
+
+        self._reserve(slot + 1)
+
+        # arrays first, a bad value fails before any list is changed
+        for ci, arr in self._arrays.items():
+            try:
+                arr[slot] = ilist[ci]
+            except (TypeError, ValueError) as e:
+                raise ListStoreError(f"Append: bad value for array column '{self.column_names[ci]}'. {e}")
+
+        for ci, v in enumerate(ilist):
+            if ci not in self._arrays:
+                self.store[ci].append(v)
+
+        self._refresh(slot + 1)
+        self._version += 1
+
+        bit = power2(slot)
+        for i in range(len(self.changed)):
+            self.changed[i] |= bit
+
+        if self.cursors:
+            self._cursors_mark(bit)
+
+        if self.indexer and self.indexer.index:
+            self.indexer.append_index(ilist, slot)
+
+        if self.orderer:
+            self.orderer.append_order(ilist, slot)
+
+    def extend(self, list_of_lists: list = None):
+        """Defaults resolved and array values converted for all rows
+           before any column changes, an error means no update."""
+
+        if not self._arrays:
+            return super().extend(list_of_lists)
+
+        if list_of_lists is None or not isinstance(list_of_lists, (list, tuple)):
+            raise ListStoreError("Extend: No input list or tuple provided.")
+
+        if len(list_of_lists) == 0:
+            return
+
+        new_list = [ self.resolve_defaults(row) for row in list_of_lists ]
+        col_list = list(zip(*new_list))
+
+        start = self.length
+        end = start + len(new_list)
+
+        converted = {}
+        for ci, arr in self._arrays.items():
+            try:
+                converted[ci] = np.asarray(col_list[ci], dtype=arr.dtype)
+            except (TypeError, ValueError) as e:
+                raise ListStoreError(f"Extend: bad value for array column '{self.column_names[ci]}'. {e}")
+
+        if self.orderer:
+            self.orderer.check_rows(new_list)
+
+        self._reserve(end)
+
+        for ci, column in enumerate(col_list):
+            if ci in self._arrays:
+                self._arrays[ci][start:end] = converted[ci]
+            else:
+                self.store[ci].extend(column)
+
+        self._refresh(end)
+        self._version += 1
+
+        bits = ((1 << len(new_list)) - 1) << start
+        for i in range(len(self.changed)):
+            self.changed[i] |= bits
+
+        if self.cursors:
+            self._cursors_mark(bits)
+
+        if self.indexer and self.indexer.index:
+            self.indexer.extend_index(new_list)
+
+        if self.orderer:
+            self.orderer.extend_order(new_list)
+
+    def pop(self, slot: int) -> tuple:
+        """Remove row, array tails shift down with one memmove."""
+
+        if not self._arrays:
+            return super().pop(slot)
+
+        length = self.length
+
+        if slot < 0 or slot >= length:
+            raise ListStoreError(f"Slot number {slot} not in NumpyStore of length {length}.")
+
+        row = []
+        for ci, column in enumerate(self.store):
+            if ci in self._arrays:
+                arr = self._arrays[ci]
+                row.append(arr[slot].item())
+                arr[slot:length - 1] = arr[slot + 1:length]
+            else:
+                row.append(column.pop(slot))
+
+        self._refresh(length - 1)
+        self._version += 1
+
+        for i in range(len(self.changed)):
+            self.changed[i] = bit_remove(self.changed[i], slot)
+
+        if self.cursors:
+            for masks, pops in self.cursors.values():
+                for i in range(len(masks)):
+                    masks[i] = bit_remove(masks[i], slot)
+                pops.append(slot)
+
+        if self.indexer:
+            self.indexer.pop_index(slot)
+
+        if self.orderer:
+            self.orderer.pop_order(slot, row)
+
+        return self.ntuple_factory(*row)
+
+    def clear(self):
+
+        super().clear()
+
+        for ci, arr in self._arrays.items():
+            self._arrays[ci] = np.zeros(ARRAY_CAPACITY, dtype=arr.dtype)
+
+        self._refresh(0)
+
+    def snapshot(self):
+        raise ListStoreError("NumpyStore: snapshot not supported, arrays change in place.")
+
+    def index_attr(self, attr_name: str):
+
+        if self.slot_for_col(attr_name) in self._arrays:
+            raise ListStoreError(f"NumpyStore: array column '{attr_name}' not indexable, use where().")
+
+        super().index_attr(attr_name)
+
+    """ Queries, vectorized for array columns """
+
+    def iwhere(self, col_name: str, op: str, *args, chunk_size: int = None):
+        """As ListStore.iwhere, array columns are compared a chunk at a time
+           with NumPy, values that can't be compared fall back to a scan."""
+
+        ci = self.slot_for_col(col_name)
+
+        if ci not in self._arrays or op not in _vector_ops:
+            yield from super().iwhere(col_name, op, *args, chunk_size=chunk_size or SCAN_CHUNK)
+            return
+
+        vfunc = _vector_ops[op]
+        func, sargs, miss = self._where_func(op, args)
+
+        column = self.store[ci]
+        length = len(column)
+        chunk_size = chunk_size or NP_CHUNK
+        version = self._version
+
+        mask = 0
+        start = 0
+
+        while start < length:
+            self._check_version(version, 'Where')
+            end = min(start + chunk_size, length)
+            try:
+                mask |= mask_from_bools(np.asarray(vfunc(column[start:end], *args), dtype=bool)) << start
+            except (TypeError, ValueError):
+                mask |= self._scan_chunk(column[start:end].tolist(), func, sargs, 0, end - start, miss) << start
+            start = end
+            yield mask
+
+        if length == 0:
+            yield 0
+
+    def _scan_groups(self, col_name: str) -> dict:
+
+        ci = self.slot_for_col(col_name)
+
+        if ci not in self._arrays:
+            return super()._scan_groups(col_name)
+
+        values, inverse = np.unique(self.store[ci], return_inverse=True)
+
+        return { v: mask_from_bools(inverse == k) for k, v in enumerate(values.tolist()) }
+
+    """ Aggregates, in C for array columns """
+
+    def masked_values(self, col_name: str, mask: int = None):
+        """Array view or masked copy for array columns, else a list."""
+
+        ci = self.slot_for_col(col_name)
+
+        if ci not in self._arrays:
+            return super().masked_values(col_name, mask)
+
+        column = self.store[ci]
+
+        if mask is None:
+            return column
+
+        return column[bools_from_mask(mask, len(column))]
+
+    def _array_agg(self, col_name: str, mask: int, func, empty):
+
+        values = self.masked_values(col_name, mask)
+
+        if len(values) == 0:
+            return empty
+
+        return func(values).item()
+
+    def sum(self, col_name: str, mask: int = None):
+
+        if self.slot_for_col(col_name) not in self._arrays:
+            return super().sum(col_name, mask)
+
+        return self._array_agg(col_name, mask, np.sum, 0)
+
+    def min(self, col_name: str, mask: int = None):
+
+        if self.slot_for_col(col_name) not in self._arrays:
+            return super().min(col_name, mask)
+
+        return self._array_agg(col_name, mask, np.min, None)
+
+    def max(self, col_name: str, mask: int = None):
+
+        if self.slot_for_col(col_name) not in self._arrays:
+            return super().max(col_name, mask)
+
+        return self._array_agg(col_name, mask, np.max, None)
+
+    def mean(self, col_name: str, mask: int = None):
+
+        if self.slot_for_col(col_name) not in self._arrays:
+            return super().mean(col_name, mask)
+
+        return self._array_agg(col_name, mask, np.mean, None)
+
+    def _arg_slot(self, col_name: str, mask: int, argfunc) -> int:
+
+        column = self.store[self.slot_for_col(col_name)]
+
+        if mask is None:
+            return int(argfunc(column)) if len(column) > 0 else -1
+
+        slots = np.flatnonzero(bools_from_mask(mask, len(column)))
+
+        return int(slots[argfunc(column[slots])]) if len(slots) > 0 else -1
+
+    def min_slot(self, col_name: str, mask: int = None) -> int:
+
+        if self.slot_for_col(col_name) not in self._arrays:
+            return super().min_slot(col_name, mask)
+
+        return self._arg_slot(col_name, mask, np.argmin)
+
+    def max_slot(self, col_name: str, mask: int = None) -> int:
+
+        if self.slot_for_col(col_name) not in self._arrays:
+            return super().max_slot(col_name, mask)
+
+        return self._arg_slot(col_name, mask, np.argmax)
@@ -0,0 +1,232 @@
+"""
+module:     orderer
+version:    v0.4.4
+sourcecode: https://github.com/billbreit/BitWiseApps
+copyleft:   2024 by Bill Breitmayer
+licence:    GNU GPL v3 or above
+author:     Bill Breitmayer
+
+Orderer for ListStore and inheritors, maintained sort orders on columns.
+Like Indexer, must be imported and set in ListStore instance with
+set_orderer(Orderer), no overhead if not used.
+
+For each ordered column, a permutation of row slots is kept sorted by
+column value, with a parallel list of the values for bisect.  Appends
+are a bisect insert, set and pop move or remove one entry, so sorted
+iteration never resorts the whole table, top-k of all rows reads k
+entries.  Top-k over a mask walks the order until k slots in the mask
+are found, a sparse mask ( under 1/8 of the rows ) sorts just its slots,
+so the cost is bounded by the mask, not k log n.
+
+Stores call check_value or check_rows before changing any column, a value
+that can't be compared with the ordered values raises OrdererError with
+the store and the orders unchanged.
+"""
+
+try:
+    from core.bitops import bit_indexes
+except ImportError:
+    from lib.core.bitops import bit_indexes
+
+try:
+    from bisect import bisect_left, bisect_right
+except ImportError:   # not in mpy standard lib
+
+    def bisect_left(a, x):
+        lo, hi = 0, len(a)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if a[mid] < x: lo = mid + 1
+            else: hi = mid
+        return lo
+
+    def bisect_right(a, x):
+        lo, hi = 0, len(a)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if x < a[mid]: hi = mid
+            else: lo = mid + 1
+        return lo
+
+
+class OrdererError(Exception):
+    pass
+
+
+class Orderer(object):
+    """Maintained sort orders for columns in a list of lists"""
+
+    def __init__(
+        self,
+        col_names: list[str] = None,
+        store: list[list] = None,
+        *args,
+        **kwargs,
+    ):
+
+        super().__init__()
+
+        if col_names is None or len(col_names) == 0:
+            raise OrdererError(
+                "Orderer: A list of column keys must provided to Orderer."
+            )
+
+        self._slots: list[str] = col_names
+        self._store = store or []
+
+        # col_name -> [ sorted values, slots in same order ]
+        self._orders: dict = {}
+
+    def __del__(self):
+        self._store = None
+
+    @property
+    def ordered(self) -> list[str]:
+        """Column names with a maintained order."""
+        return list(self._orders.keys())
+
+    def clear(self):
+        """Empty all orders, keep ordered column names."""
+
+        for col_name in self._orders:
+            self._orders[col_name] = [[], []]
+
+    def order_attr(self, col_name: str):
+        """Create or rebuild sort order for column name"""
+
+        if col_name not in self._slots:
+            raise OrdererError(f"Order Attr: Column '{col_name}' not known.")
+
+        column = self._store[self._slots.index(col_name)]
+
+        try:
+            slots = sorted(range(len(column)), key=lambda i: column[i])
+        except TypeError as e:
+            raise OrdererError(f"Order Attr: Column '{col_name}' values not sortable. {e}")
+
+        self._orders[col_name] = [[column[i] for i in slots], slots]
+
+    def drop_attr(self, col_name: str):
+        """Drop sort order for column name."""
+
+        if col_name in self._orders:
+            del self._orders[col_name]
+
+    def reorder(self):
+        """Rebuild all orders completely."""
+
+        for col_name in self._orders:
+            self.order_attr(col_name)
+
+    def check_value(self, col_name: str, value):
+        """Raise OrdererError if value can't be bisected into the order
+           for col_name.  Called before the store is changed."""
+
+        if col_name not in self._orders:
+            return
+
+        try:
+            bisect_right(self._orders[col_name][0], value)
+        except TypeError as e:
+            raise OrdererError(f"Order for '{col_name}', value '{value}' not sortable. {e}")
+
+    def check_rows(self, list_of_lists: list[list]):
+        """check_value for the ordered columns of new rows, also against
+           the first new row, for an empty order."""
+
+        if not list_of_lists:
+            return
+
+        for col_name, (values, _) in self._orders.items():
+            ci = self._slots.index(col_name)
+            ref = values or [ list_of_lists[0][ci] ]
+            for row in list_of_lists:
+                try:
+                    bisect_right(ref, row[ci])
+                except TypeError as e:
+                    raise OrdererError(f"Order for '{col_name}', value '{row[ci]}' not sortable. {e}")
+
+    def _insert(self, col_name: str, value, slot: int):
+
+        values, slots = self._orders[col_name]
+
+        try:
+            pos = bisect_right(values, value)
+        except TypeError as e:
+            self.drop_attr(col_name)
+            raise OrdererError(f"Order for '{col_name}' dropped, value '{value}' not sortable. {e}")
+
+        values.insert(pos, value)
+        slots.insert(pos, slot)
+
+    def _remove(self, col_name: str, value, slot: int):
+
+        values, slots = self._orders[col_name]
+
+        pos = bisect_left(values, value)
+        while slots[pos] != slot:   # walk run of equal values
+            pos += 1
+
+        del values[pos]
+        del slots[pos]
+
+    def update_order(self, col_name: str, row_slot: int, old_value, new_value):
+        """An altered row via set(), move slot to position of new value."""
+
+        if col_name not in self._orders:
+            return
+
+        self._remove(col_name, old_value, row_slot)
+        self._insert(col_name, new_value, row_slot)
+
+    def append_order(self, list_in: list, new_slot: int = None):
+        """Bisect insert slot of appended row, called after append to store."""
+
+        if new_slot is None:
+            new_slot = len(self._store[0]) - 1
+
+        for col_name in self.ordered:
+            self._insert(col_name, list_in[self._slots.index(col_name)], new_slot)
+
+    def extend_order(self, list_of_lists: list[list]):
+        """Insert new rows, already extended into store.  Large batches
+           are cheaper to resort than to insert one by one."""
+
+        if len(list_of_lists) > len(self._store[0]) // 4:
+            self.reorder()
+            return
+
+        first_slot = len(self._store[0]) - len(list_of_lists)
+
+        for i, ls in enumerate(list_of_lists):
+            self.append_order(ls, first_slot + i)
+
+    def pop_order(self, row_slot: int, popped_row: list):
+        """Remove popped slot and shift down the slots above it."""
+
+        for col_name, (values, slots) in self._orders.items():
+            self._remove(col_name, popped_row[self._slots.index(col_name)], row_slot)
+            self._orders[col_name][1] = [ s - 1 if s > row_slot else s for s in slots ]
+
+    def sorted_slots(self, col_name: str, reverse: bool = False, mask: int = None):
+        """Yield slots in column value order, optionally only slots in mask."""
+
+        if col_name not in self._orders:
+            raise OrdererError(f"Sorted Slots: Column '{col_name}' not ordered.")
+
+        slots = self._orders[col_name][1]
+        positions = range(len(slots) - 1, -1, -1) if reverse else range(len(slots))
+
+        if mask is None:
+            for p in positions:
+                yield slots[p]
+        else:
+            wanted = bit_indexes(mask)
+            if len(wanted) * 8 < len(slots):   # sparse, sort the masked slots
+                column = self._store[self._slots.index(col_name)]
+                yield from sorted(wanted, key=lambda i: column[i], reverse=reverse)
+                return
+            wanted = set(wanted)
+            for p in positions:
+                if slots[p] in wanted:
+                    yield slots[p]
@@ -0,0 +1,418 @@
+"""
+module:     partstore
+version:    v0.4.4
+sourcecode: https://github.com/billbreit/BitWiseApps
+copyleft:   2024 by Bill Breitmayer
+licence:    GNU GPL v3 or above
+author:     Bill Breitmayer
+
+PartitionedStore - a wrapper over TupleStore for long histories, say weeks
+                   of sensor readings, with rows routed to one partition
+                   per period, each partition a TupleStore with its own
+                   indexer, changed and index masks.
+
+The period is 'day' or 'hour' of a time column, or an int, N rows per
+partition.  Time values are either timestamp() tuples, ( y, m, d, h, m, s ),
+or epoch seconds.  Each partition keeps the min and max of its time column,
+so a time range query skips partitions that can't match, and the cost of
+a query scales with the time window, not the whole history.
+
+Results are lists of ( partition key, row mask ) pairs, masks are local
+to a partition.  Old partitions can be saved to NDJSON and dropped from
+memory as a unit, and loaded again later.
+
+ps = PartitionedStore('Reading', ['time', 'sensor', 'temp'], time_col='time', period='day')
+ps.set_indexer(Indexer)
+ps.index_attr('sensor')
+ps.extend(readings)
+hits = ps.where('temp', 'gt', 30.0, start=(2024, 6, 1), end=(2024, 6, 8))
+rows = ps.get_rows(hits)
+ps.archive(before=(2024, 5, 1))   # save and drop partitions older than May
+
+Time range is start <= time < end, a short tuple like (2024, 6, 1) compares
+before any time in the day.
+"""
+
+try:
+    from tuplestore import TupleStore, ListStoreError
+except ImportError:
+    from lib.tuplestore import TupleStore, ListStoreError
+
+try:
+    from storeio import export_ndjson, import_ndjson
+except ImportError:
+    from lib.storeio import export_ndjson, import_ndjson
+
+
+class PartitionedStoreError(Exception):
+    pass
+
+
+SECONDS_PER = { 'day': 86400, 'hour': 3600 }
+TUPLE_PREFIX = { 'day': 3, 'hour': 4 }
+
+
+class PartitionedStore(object):
+    """Rows routed to per-period TupleStore partitions, pruned by time range."""
+
+    def __init__(
+        self,
+        nt_name: str,
+        column_defs: list = None,
+        defaults: list = None,
+        time_col: str = None,
+        period='day',
+    ):
+
+        if period not in SECONDS_PER and not (isinstance(period, int) and period > 0):
+            raise PartitionedStoreError("PartitionedStore: period must be 'day', 'hour' or an int > 0.")
+
+        if column_defs is None or time_col not in column_defs:
+            raise PartitionedStoreError(f"PartitionedStore: time_col '{time_col}' not in column_defs.")
+
+        self.nt_name = nt_name
+        self.column_names = list(column_defs)
+        self.defaults = defaults
+        self.time_col = time_col
+        self.period = period
+
+        self._time_slot = self.column_names.index(time_col)
+        self._partitions: dict = {}   # key -> TupleStore
+        self._keys: list = []         # sorted partition keys
+        self._bounds: dict = {}       # key -> [ min time, max time ]
+
+        self._indexer_cls = None
+        self._usertypes = None
+        self._indexed: list[str] = []
+
+        # empty store, for resolve_defaults()
+        self._resolver = TupleStore(nt_name, self.column_names, defaults)
+
+    """ Partitions """
+
+    def partition_key(self, time_value):
+        """Partition key for a time value, day or hour periods."""
+
+        if isinstance(time_value, (tuple, list)):
+            return tuple(time_value[:TUPLE_PREFIX[self.period]])
+
+        return int(time_value) // SECONDS_PER[self.period]
+
+    def _route(self, row: list):
+        """Key of the partition for a new row, created if needed."""
+
+        if isinstance(self.period, int):
+            if self._keys and self._partitions[self._keys[-1]].length < self.period:
+                return self._keys[-1]
+            key = self._keys[-1] + 1 if self._keys else 0
+        else:
+            key = self.partition_key(row[self._time_slot])
+
+        if key not in self._partitions:
+            self._add_partition(key, self._new_partition())
+
+        return key
+
+    def _new_partition(self) -> TupleStore:
+
+        part = TupleStore(self.nt_name, self.column_names, self.defaults)
+
+        if self._indexer_cls:
+            part.set_indexer(self._indexer_cls, self._usertypes)
+            for col_name in self._indexed:
+                part.index_attr(col_name)
+
+        return part
+
+    def _add_partition(self, key, part: TupleStore):
+
+        self._partitions[key] = part
+        self._keys.append(key)
+        self._keys.sort()
+
+        if part.length > 0:
+            times = part.get_column(self.time_col)
+            self._bounds[key] = [ min(times), max(times) ]
+
+    def _widen(self, key, time_value):
+
+        bounds = self._bounds.get(key)
+
+        if bounds is None:
+            self._bounds[key] = [ time_value, time_value ]
+        elif time_value < bounds[0]:
+            bounds[0] = time_value
+        elif time_value > bounds[1]:
+            bounds[1] = time_value
+
+    @property
+    def partitions(self) -> list:
+        """Partition keys in order."""
+
+        return list(self._keys)
+
+    def partition(self, key) -> TupleStore:
+
+        if key not in self._partitions:
+            raise PartitionedStoreError(f"Partition {key} not in store.")
+
+        return self._partitions[key]
+
+    def bounds(self, key) -> tuple:
+        """( min time, max time ) in a partition, None if empty."""
+
+        b = self._bounds.get(key)
+
+        return tuple(b) if b else None
+
+    def partition_keys(self, start=None, end=None) -> list:
+        """Keys of partitions that may hold times in start <= time < end,
+           the pruning step for range queries."""
+
+        keys = []
+        for key in self._keys:
+            b = self._bounds.get(key)
+            if b is None:
+                continue
+            if start is not None and b[1] < start:
+                continue
+            if end is not None and b[0] >= end:
+                continue
+            keys.append(key)
+
+        return keys
+
+    @property
+    def length(self) -> int:
+
+        return sum([ part.length for part in self._partitions.values() ])
+
+    """ Update """
+
+    def append(self, in_list: list = None):
+
+        if in_list is None:
+            raise PartitionedStoreError("Append: list passed can not be None")
+
+        if len(in_list) != len(self.column_names):
+            in_list = self._resolver.resolve_defaults(in_list)
+
+        key = self._route(in_list)
+        self._partitions[key].append(in_list)
+        self._widen(key, in_list[self._time_slot])
+
+    def extend(self, list_of_lists: list = None):
+        """Group rows by partition, one extend per partition.  Defaults are
+           resolved first, an error means no update."""
+
+        if list_of_lists is None or not isinstance(list_of_lists, (list, tuple)):
+            raise PartitionedStoreError("Extend: No input list or tuple provided.")
+
+        if self.defaults:
+            list_of_lists = [ self._resolver.resolve_defaults(lst) for lst in list_of_lists ]
+
+        if isinstance(self.period, int):
+            for row in list_of_lists:   # fill, then spill into new partitions
+                self.append(row)
+            return
+
+        groups = {}
+        for row in list_of_lists:
+            groups.setdefault(self.partition_key(row[self._time_slot]), []).append(row)
+
+        for key, rows in groups.items():
+            if key not in self._partitions:
+                self._add_partition(key, self._new_partition())
+            self._partitions[key].extend(rows)
+            times = [ row[self._time_slot] for row in rows ]
+            self._widen(key, min(times))
+            self._widen(key, max(times))
+
+    def set(self, key, slot: int, col_name: str, value):
+        """Set a value in a partition.  A new time stays in the partition,
+           bounds are widened so pruning stays correct."""
+
+        self.partition(key).set(slot, col_name, value)
+
+        if col_name == self.time_col:
+            self._widen(key, value)
+
+    """ Query, ( partition key, row mask ) results """
+
+    def _time_mask(self, key, start, end):
+        """Mask of rows in time range, None when the whole partition is in
+           range and no scan is needed."""
+
+        b = self._bounds[key]
+        part = self._partitions[key]
+
+        if (start is None or b[0] >= start) and (end is None or b[1] < end):
+            return None
+
+        mask = part.where(self.time_col, 'gte', start) if start is not None else (1 << part.length) - 1
+        if end is not None:
+            mask &= part.where(self.time_col, 'lt', end)
+
+        return mask
+
+    def where(self, col_name: str, op: str, *args, start=None, end=None) -> list:
+        """List of ( key, mask ) for rows where col_name passes op, within
+           start <= time < end.  Pruned partitions are not scanned."""
+
+        results = []
+
+        for key in self.partition_keys(start, end):
+            part = self._partitions[key]
+            tmask = self._time_mask(key, start, end)
+            if tmask == 0:
+                continue
+            mask = part.where(col_name, op, *args)
+            if tmask is not None:
+                mask &= tmask
+            if mask:
+                results.append((key, mask))
+
+        return results
+
+    def index_mask(self, col_name: str, value, start=None, end=None) -> list:
+        """As where(), using the partition indexes for an indexed column."""
+
+        if col_name not in self._indexed:
+            raise PartitionedStoreError(f"Index Mask: column '{col_name}' not indexed.")
+
+        results = []
+
+        for key in self.partition_keys(start, end):
+            mask = self._partitions[key].index[col_name].get(value, 0)
+            if mask:
+                tmask = self._time_mask(key, start, end)
+                if tmask is not None:
+                    mask &= tmask
+            if mask:
+                results.append((key, mask))
+
+        return results
+
+    def time_range(self, start=None, end=None) -> list:
+        """List of ( key, mask ) for all rows in start <= time < end."""
+
+        results = []
+
+        for key in self.partition_keys(start, end):
+            tmask = self._time_mask(key, start, end)
+            if tmask is None:
+                tmask = (1 << self._partitions[key].length) - 1
+            if tmask:
+                results.append((key, tmask))
+
+        return results
+
+    def get_rows(self, results: list) -> list[tuple]:
+        """Rows for a list of ( key, mask ) results, in partition order."""
+
+        return [ row for key, mask in results
+                 for row in self._partitions[key].get_rows(mask) ]
+
+    def count(self, results: list) -> int:
+
+        return sum([ bin(mask).count('1') for _, mask in results ])
+
+    def __iter__(self):
+
+        for key in self._keys:
+            yield from self._partitions[key]
+
+    """ Index, per partition """
+
+    def set_indexer(self, indexer_cls: 'IndexerClass' = None, usertypes: list = None):
+
+        if not indexer_cls or not isinstance(indexer_cls, type):
+            raise PartitionedStoreError('Set index function needs Indexer class.')
+
+        self._indexer_cls = indexer_cls
+        self._usertypes = usertypes
+
+        for part in self._partitions.values():
+            part.set_indexer(indexer_cls, usertypes)
+
+    def index_attr(self, attr_name: str):
+
+        if not self._indexer_cls:
+            return
+
+        for part in self._partitions.values():
+            part.index_attr(attr_name)
+
+        if attr_name not in self._indexed:
+            self._indexed.append(attr_name)
+
+    def drop_attr(self, attr_name: str):
+
+        if attr_name in self._indexed:
+            self._indexed.remove(attr_name)
+            for part in self._partitions.values():
+                part.drop_attr(attr_name)
+
+    """ Save, drop, load partitions """
+
+    def drop_partition(self, key) -> TupleStore:
+        """Remove partition from memory, returns it."""
+
+        part = self.partition(key)
+
+        del self._partitions[key]
+        self._keys.remove(key)
+        self._bounds.pop(key, None)
+
+        return part
+
+    def save_partition(self, key, filename: str) -> int:
+        """Write partition rows to an NDJSON file, returns rows written."""
+
+        return export_ndjson(self.partition(key), filename, as_objects=False)
+
+    def load_partition(self, filename: str) -> int:
+        """Load rows saved by save_partition, routed as for extend(),
+           returns rows loaded.  JSON lists in the time column are
+           restored to tuples."""
+
+        part = TupleStore(self.nt_name, self.column_names, self.defaults)
+        import_ndjson(part, filename)
+
+        rows = [ list(row) for row in part ]
+        for row in rows:
+            if isinstance(row[self._time_slot], list):
+                row[self._time_slot] = tuple(row[self._time_slot])
+
+        if rows:
+            self.extend(rows)
+
+        return len(rows)
+
+    def archive(self, before, filename_fmt: str = '{name}_{key}.ndjson') -> list:
+        """Save and drop every partition with all times < before.  Returns
+           list of ( key, filename ).  filename_fmt gets name and key, key
+           tuples are joined with '_'."""
+
+        archived = []
+
+        for key in list(self._keys):
+            b = self._bounds.get(key)
+            if b is None or b[1] >= before:
+                continue
+            key_str = '_'.join([ str(k) for k in key ]) if isinstance(key, tuple) else str(key)
+            filename = filename_fmt.format(name=self.nt_name, key=key_str)
+            self.save_partition(key, filename)
+            self.drop_partition(key)
+            archived.append((key, filename))
+
+        return archived
+
+    """ Memory accounting """
+
+    def memory_report(self) -> dict:
+        """{ 'partitions': { key: total bytes }, 'total': bytes }"""
+
+        parts = { key: self._partitions[key].memory_report()['total'] for key in self._keys }
+
+        return { 'partitions': parts, 'total': sum(parts.values()) }
@@ -0,0 +1,400 @@
+"""
+module:     ringstore
+version:    v0.4.4
+sourcecode: https://github.com/billbreit/BitWiseApps
+copyleft:   2024 by Bill Breitmayer
+licence:    GNU GPL v3 or above
+author:     Bill Breitmayer
+
+RingStore - a capped TupleStore for rolling windows, time-series sensor
+            logs and the like.  Columns are preallocated to capacity and
+            used as a ring buffer with a head pointer, so an append to a
+            full store evicts the oldest row in O(1), rather than pop(0)
+            shifting every column list, changed mask and index mask.
+
+Slots in the API are logical, 0 is the oldest row, length-1 the newest.
+Internally, changed and index masks are kept by ring position and never
+compacted, a mask is rotated by the head pointer to give logical slots.
+
+Each appended row also gets a sequence number, counting from 0 for the
+first row ever appended, so a consumer can tell which rows it has seen
+across evictions, first_seq is the sequence number of logical slot 0.
+
+rs = RingStore('Reading', ['time', 'temp'], capacity=1000)
+rs.append([ timestamp(), 21.4 ])
+rs.mean('temp', rs.where('time', 'gt', start_time ))
+
+"""
+
+try:
+    from tuplestore import TupleStore, ListStoreError, UpsertCount, SCAN_CHUNK
+except ImportError:
+    from lib.tuplestore import TupleStore, ListStoreError, UpsertCount, SCAN_CHUNK
+
+try:
+    from lib.core.bitops import power2
+except ImportError:
+    from core.bitops import power2
+
+
+class RingStore(TupleStore):
+    """Fixed capacity TupleStore, oldest row evicted on append when full."""
+
+    def __init__(
+        self,
+        nt_name: str,
+        column_defs: list = None,
+        capacity: int = 100,
+        defaults: list = None,
+    ):
+
+        if not isinstance(capacity, int) or capacity < 1:
+            raise ListStoreError("RingStore: capacity must be an int > 0.")
+
+        super().__init__(nt_name, column_defs, defaults)
+
+        self.capacity = capacity
+        self.store = [ [None] * capacity for _ in self.column_names ]
+
+        self._head = 0    # ring position of logical slot 0
+        self._count = 0
+        self._seq = 0     # sequence number of next appended row
+
+    @property
+    def length(self) -> int:
+        return self._count
+
+    @property
+    def first_seq(self) -> int:
+        """Sequence number of the oldest row, logical slot 0."""
+        return self._seq - self._count
+
+    def seq_to_slot(self, seq: int) -> int:
+        """Logical slot for a sequence number, -1 if evicted or not yet appended."""
+
+        slot = seq - self.first_seq
+
+        return slot if 0 <= slot < self._count else -1
+
+    """ Ring positions and mask rotation """
+
+    def _pos(self, slot: int) -> int:
+        return (self._head + slot) % self.capacity
+
+    def to_logical(self, ring_mask: int) -> int:
+        """Rotate a mask by ring position to a mask by logical slot."""
+
+        if self._head == 0:
+            return ring_mask
+
+        full = (1 << self.capacity) - 1
+        return ((ring_mask >> self._head) | (ring_mask << (self.capacity - self._head))) & full
+
+    def to_ring(self, mask: int) -> int:
+        """Rotate a mask by logical slot to a mask by ring position."""
+
+        if self._head == 0:
+            return mask
+
+        full = (1 << self.capacity) - 1
+        return ((mask << self._head) | (mask >> (self.capacity - self._head))) & full
+
+    """ Access """
+
+    def check_slot(self, slot: int):
+
+        if slot < 0 or slot >= self._count:
+            raise ListStoreError(f"Slot number {slot} not in RingStore of length {self._count}.")
+
+    def __iter__(self):
+
+        for slot in range(self._count):
+            yield self.get_row(slot)
+
+    def dump(self):
+
+        for slot in range(self._count):
+            yield self.get_row(slot)
+
+    def get(self, slot: int, col_name: str):
+
+        self.check_slot(slot)
+
+        return self.store[self.slot_for_col(col_name)][self._pos(slot)]
+
+    def get_column(self, col_name: str) -> list:
+        """Column values in logical order, oldest first.  A copy."""
+
+        column = self.store[self.slot_for_col(col_name)]
+        end = self._head + self._count
+
+        if end <= self.capacity:
+            return column[self._head:end]
+
+        return column[self._head:] + column[:end - self.capacity]
+
+    def get_row(self, slot: int, asdict=False):
+
+        self.check_slot(slot)
+
+        pos = self._pos(slot)
+        row = [ column[pos] for column in self.store ]
+
+        if asdict:
+            return dict(zip(self.column_names, row))
+
+        return self.ntuple_factory(*row)
+
+    def find_all(self, col_name: str, value) -> list[int]:
+
+        column = self.get_column(col_name)
+
+        return [ i for i, v in enumerate(column) if v == value ]
+
+    """ Changed masks, by ring position """
+
+    def rows_changed(self) -> int:
+
+        return self.to_logical(super().rows_changed())
+
+    def values_changed(self, row: int) -> list[int]:
+
+        self.check_slot(row)
+        bit = power2(self._pos(row))
+
+        return [ i for i in range(len(self.column_names)) if bit & self.changed[i] ]
+
+    def reset_changed(self, slot: int = None):
+
+        if slot is None:
+            self.changed = [0] * len(self.column_names)
+            return
+
+        self.check_slot(slot)
+        bit = power2(self._pos(slot))
+
+        for i in range(len(self.column_names)):
+            self.changed[i] &= ~bit
+
+    """ Update """
+
+    def set(self, slot: int, col_name: str, value):
+
+        self.check_slot(slot)
+
+        pos = self._pos(slot)
+        col_slot = self.slot_for_col(col_name)
+        old_value = self.store[col_slot][pos]
+
+        self.store[col_slot][pos] = value
+        self._version += 1
+
+        if self.indexer:
+            self.indexer.update_index(col_name, pos, old_value, value)
+
+        self.changed[col_slot] |= power2(pos)
+
+    def _upsert_apply(self, updates: list) -> tuple:
+        """Through set(), logical slots to ring positions."""
+
+        return self._upsert_set(updates)
+
+    def upsert_many(self, rows: list, key_columns: list) -> UpsertCount:
+        """As TupleStore.upsert_many, but an update to a row the inserts
+           would evict is appended as a new row instead, the old one goes
+           with the eviction.  Counts are what is left in the ring, only
+           the last capacity inserts are kept, as for extend()."""
+
+        updates, inserts = self._upsert_split(rows, key_columns)
+
+        moved = []
+        while True:   # each moved row is one more insert, may evict more
+            evict = self._count + len(moved) + len(inserts) - self.capacity
+            stay = [ (slot, rrow) for slot, rrow in updates if slot >= evict ]
+            if len(stay) == len(updates):
+                break
+            moved.extend([ rrow for slot, rrow in updates if slot < evict ])
+            updates = stay
+
+        updated, unchanged = self._upsert_apply(updates)
+
+        inserts = moved + inserts
+        if len(inserts) > 0:
+            self.extend(inserts)
+
+        return UpsertCount(min(len(inserts), self.capacity), updated, unchanged)
+
+    def append(self, in_list: list = None):
+        """Append row, if full overwrite the oldest row and advance head."""
+
+        if in_list is None:
+            raise ListStoreError("Append: list passed can not be None")
+
+        if len(in_list) != len(self.store):
+            if self.defaults:
+                in_list = self.resolve_defaults(in_list)
+            else:
+                raise ListStoreError(
+                    "Append: List missing values and no defaults defined."
+                )
+
+        if self._count == self.capacity:   # evict oldest
+            pos = self._head
+            self._unindex(pos)
+            self._head = (self._head + 1) % self.capacity
+        else:
+            pos = (self._head + self._count) % self.capacity
+            self._count += 1
+
+        bit = power2(pos)
+
+        for i, v in enumerate(in_list):
+            self.store[i][pos] = v
+            self.changed[i] |= bit
+        self._version += 1
+
+        if self.indexer and self.indexer.index:
+            self.indexer.append_index(in_list, pos)
+
+        self._seq += 1
+
+    def extend(self, list_of_lists: list = None):
+        """Append rows in order, only the last capacity rows are kept."""
+
+        if list_of_lists is None or not isinstance(list_of_lists, (list, tuple)):
+            raise ListStoreError("Extend: No input list or tuple provided.")
+
+        new_list = [ self.resolve_defaults(row) for row in list_of_lists ]
+
+        for row in new_list:
+            self.append(row)
+
+    def pop(self, slot: int) -> tuple:
+        """Only the ends of the ring, pop(0) oldest or pop(length-1) newest."""
+
+        self.check_slot(slot)
+
+        if slot not in (0, self._count - 1):
+            raise ListStoreError("RingStore: pop only from oldest (0) or newest (length-1) slot.")
+
+        pos = self._pos(slot)
+        row = self.ntuple_factory(*[ column[pos] for column in self.store ])
+
+        self._unindex(pos)
+
+        for i in range(len(self.column_names)):
+            self.store[i][pos] = None
+            self.changed[i] &= ~power2(pos)
+
+        if slot == 0:
+            self._head = (self._head + 1) % self.capacity
+        else:
+            self._seq -= 1    # newest seq number is free again
+
+        self._count -= 1
+        self._version += 1
+
+        return row
+
+    def clear(self):
+
+        self.store = [ [None] * self.capacity for _ in self.column_names ]
+        self.changed = [0] * len(self.column_names)
+        self._head = 0
+        self._count = 0
+        self._version += 1
+
+        if self.indexer:    # indexer holds a ref to store
+            self.indexer._store = self.store
+            self.indexer.clear()
+
+    def snapshot(self):
+        raise ListStoreError("RingStore: snapshot not supported, rows overwritten in place.")
+
+    def open_cursor(self, name: str, from_start: bool = False):
+        raise ListStoreError("RingStore: change cursors not supported, use seq numbers.")
+
+    def set_orderer(self, orderer_cls=None):
+        raise ListStoreError("RingStore: sort orders not supported.")
+
+    """ Index, masks by ring position, rotated for logical slots """
+
+    def _unindex(self, pos: int):
+        """Clear ring position pos from index masks, row being evicted."""
+
+        if not self.indexer:
+            return
+
+        bit = power2(pos)
+        index = self.indexer.index
+
+        for col_name in index:
+            value = self.store[self.slot_for_col(col_name)][pos]
+            if value in index[col_name]:
+                index[col_name][value] &= ~bit
+                if index[col_name][value] == 0:
+                    del index[col_name][value]
+
+    def _mask_unused(self, attr_name: str):
+        """Drop unused ring positions from a column index."""
+
+        used = self.to_ring((1 << self._count) - 1)
+        sub_dict = self.indexer.index[attr_name]
+
+        for value in list(sub_dict.keys()):
+            sub_dict[value] &= used
+            if sub_dict[value] == 0:
+                del sub_dict[value]
+
+    def index_attr(self, attr_name: str):
+        """Index column, without the unused ring positions."""
+
+        if not self.indexer:
+            return
+
+        self.indexer.index_attr(attr_name)
+        self._mask_unused(attr_name)
+
+    def reindex(self):
+
+        if self.indexer:
+            for attr_name in list(self.indexer.index.keys()):
+                self.index_attr(attr_name)
+
+    def ireindex(self, chunk_size: int = SCAN_CHUNK):
+        """Chunked reindex by ring position, yields positions done in the
+           current column, of capacity.  Unused positions are masked out as
+           each column is done.  An append or eviction between chunks raises
+           ListStoreError, as for TupleStore.ireindex."""
+
+        if not self.indexer:
+            return
+
+        version = self._version
+
+        for attr_name in list(self.indexer.index.keys()):
+            for done in self.indexer.iindex_attr(attr_name, chunk_size):
+                yield done
+                self._check_version(version, 'Reindex')
+            self._mask_unused(attr_name)
+
+    @property
+    def index(self) -> dict:
+        """Index with masks rotated to logical slots, computed on access.
+           The raw ring position masks are in self.indexer.index."""
+
+        if self.indexer:
+            return { col: { v: self.to_logical(m) for v, m in sub.items() }
+                     for col, sub in self.indexer.index.items() }
+
+    def _index_groups(self, col_name: str) -> dict:
+
+        if self.indexer and col_name in self.indexer.index:
+            return { v: self.to_logical(m) for v, m in self.indexer.index[col_name].items() }
+
+        return None
+
+    def index_mask(self, col_name: str, value) -> int:
+        """Logical slot mask for one indexed value, 0 if none."""
+
+        return self.to_logical(self.indexer.index[col_name].get(value, 0))
@@ -0,0 +1,538 @@
+"""
+module:     segstore
+version:    v0.4.4
+sourcecode: https://github.com/billbreit/BitWiseApps
+copyleft:   2024 by Bill Breitmayer
+licence:    GNU GPL v3 or above
+author:     Bill Breitmayer
+
+SegmentStore - a TupleStore for very large stores, with columns stored as
+               fixed size segments, say 1024 rows, each segment with its
+               own column lists, changed masks and index masks.
+
+With one list per column and one int mask per index value, an append may
+reallocate a huge list and a pop shifts every mask in the store, bit ops
+on 100K bit ints get costly.  In a SegmentStore, an append or a pop only
+touches the last or one segment, a bounded amount of work per operation.
+
+Queries ( where, index_mask, rows_changed ) combine per-segment masks into
+one int row mask, so results compose with the usual & | ~ operations.
+
+ss = SegmentStore('Reading', ['time', 'sensor', 'temp'], segment_size=1024)
+ss.set_indexer(Indexer)
+ss.index_attr('sensor')
+ss.get_rows( ss.index_mask('sensor', 'attic') & ss.where('temp', 'gt', 30.0))
+
+Note that the flat store attribute is assembled on access, a copy, for
+compatibility with code that reads store directly, like display_store.
+"""
+
+try:
+    from tuplestore import TupleStore, ListStoreError
+except ImportError:
+    from lib.tuplestore import TupleStore, ListStoreError
+
+try:
+    from lib.core.bitops import power2, bit_remove
+except ImportError:
+    from core.bitops import power2, bit_remove
+
+try:
+    from lib.core.memsize import sizeof, values_size
+except ImportError:
+    from core.memsize import sizeof, values_size
+
+try:
+    from bisect import bisect_right
+except ImportError:   # not in mpy standard lib
+
+    def bisect_right(a, x):
+        lo, hi = 0, len(a)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if x < a[mid]: hi = mid
+            else: lo = mid + 1
+        return lo
+
+
+SEGMENT_SIZE = 1024
+
+
+class Segment(object):
+    """Fixed capacity slice of rows, with its own changed and index masks."""
+
+    def __init__(self, num_cols: int):
+
+        self.store: list[list] = [ [] for _ in range(num_cols) ]
+        self.changed: list[int] = [0] * num_cols
+        self.index: dict = {}   # col_name -> { value: segment mask }
+
+    @property
+    def length(self) -> int:
+        return len(self.store[0])
+
+
+class SegmentStore(TupleStore):
+    """TupleStore with segmented columns, bounded cost per update."""
+
+    def __init__(
+        self,
+        nt_name: str,
+        column_defs: list = None,
+        defaults: list = None,
+        segment_size: int = SEGMENT_SIZE,
+    ):
+
+        if not isinstance(segment_size, int) or segment_size < 1:
+            raise ListStoreError("SegmentStore: segment_size must be an int > 0.")
+
+        super().__init__(nt_name, column_defs, defaults)
+
+        self.segment_size = segment_size
+        self.segments: list[Segment] = []
+        self._starts: list[int] = []   # first slot of each segment
+        self._count = 0
+
+        # Indexer class, set by set_indexer, per segment indexes are kept here
+        self._index_cls = None
+        self._indexable: tuple = ()
+        self._indexed: list[str] = []
+
+    """ Flat views, copies """
+
+    @property
+    def store(self) -> list[list]:
+        """Flat list of lists, assembled from segments on access."""
+
+        return [ [ v for seg in self.segments for v in seg.store[i] ]
+                 for i in range(len(self.column_names)) ]
+
+    @store.setter
+    def store(self, value):
+
+        if hasattr(self, 'segments'):   # only base __init__ may assign, before segments
+            raise AttributeError("SegmentStore: store is a read-only flat view, "
+                                 "update through set, append, extend or pop.")
+
+    @property
+    def changed(self) -> list[int]:
+        """Flat changed masks, assembled from segments on access."""
+
+        changed = [0] * len(self.column_names)
+
+        for seg, start in zip(self.segments, self._starts):
+            for i, m in enumerate(seg.changed):
+                changed[i] |= m << start
+
+        return changed
+
+    @changed.setter
+    def changed(self, value):
+
+        if hasattr(self, 'segments'):
+            raise AttributeError("SegmentStore: changed is a read-only flat view, "
+                                 "use reset_changed.")
+
+    @property
+    def length(self) -> int:
+        return self._count
+
+    def _locate(self, slot: int) -> tuple:
+        """Return ( segment number, offset in segment ) for slot."""
+
+        self.check_slot(slot)
+        k = bisect_right(self._starts, slot) - 1
+
+        return k, slot - self._starts[k]
+
+    def check_slot(self, slot: int):
+
+        if slot < 0 or slot >= self._count:
+            raise ListStoreError(f"Slot number {slot} not in SegmentStore of length {self._count}.")
+
+    """ Access """
+
+    def __iter__(self):
+
+        for seg in self.segments:
+            for row in zip(*seg.store):
+                yield self.ntuple_factory(*row)
+
+    def dump(self):
+
+        yield from self.__iter__()
+
+    def get(self, slot: int, col_name: str):
+
+        k, off = self._locate(slot)
+
+        return self.segments[k].store[self.slot_for_col(col_name)][off]
+
+    def get_column(self, col_name: str) -> list:
+        """Column values, a copy joined from segments."""
+
+        ci = self.slot_for_col(col_name)
+
+        return [ v for seg in self.segments for v in seg.store[ci] ]
+
+    def get_row(self, slot: int, asdict=False):
+
+        k, off = self._locate(slot)
+        row = [ column[off] for column in self.segments[k].store ]
+
+        if asdict:
+            return dict(zip(self.column_names, row))
+
+        return self.ntuple_factory(*row)
+
+    def find(self, col_name: str, value, start=0) -> int:
+
+        ci = self.slot_for_col(col_name)
+
+        for seg, seg_start in zip(self.segments, self._starts):
+            if seg_start + seg.length <= start:
+                continue
+            try:
+                off = seg.store[ci].index(value, max(0, start - seg_start))
+            except ValueError:
+                continue
+            return seg_start + off
+
+        return -1
+
+    def find_all(self, col_name: str, value) -> list[int]:
+
+        ci = self.slot_for_col(col_name)
+
+        return [ seg_start + off for seg, seg_start in zip(self.segments, self._starts)
+                 for off, v in enumerate(seg.store[ci]) if v == value ]
+
+    def iwhere(self, col_name: str, op: str, *args, chunk_size: int = None):
+        """Scan segment by segment, yield running mask after each segment."""
+
+        func, args, miss = self._where_func(op, args)
+        ci = self.slot_for_col(col_name)
+        version = self._version
+
+        mask = 0
+        for seg, start in zip(self.segments, self._starts):
+            self._check_version(version, 'Where')
+            mask |= self._scan_chunk(seg.store[ci], func, args, 0, seg.length, miss) << start
+            yield mask
+
+        if self._count == 0:
+            yield 0
+
+    """ Changed masks, per segment """
+
+    def rows_changed(self) -> int:
+
+        rc = 0
+        for seg, start in zip(self.segments, self._starts):
+            seg_rc = 0
+            for m in seg.changed:
+                seg_rc |= m
+            rc |= seg_rc << start
+
+        return rc
+
+    def values_changed(self, row: int) -> list[int]:
+
+        k, off = self._locate(row)
+        bit = power2(off)
+
+        return [ i for i, m in enumerate(self.segments[k].changed) if m & bit ]
+
+    def reset_changed(self, slot: int = None):
+
+        if slot is None:
+            for seg in self.segments:
+                seg.changed = [0] * len(self.column_names)
+            return
+
+        k, off = self._locate(slot)
+        seg = self.segments[k]
+        for i in range(len(seg.changed)):
+            seg.changed[i] &= ~power2(off)
+
+    """ Update, touches one segment """
+
+    def _index_value(self, seg: Segment, col_name: str, value, off: int):
+
+        if type(value) in self._indexable:
+            sub = seg.index[col_name]
+            sub[value] = sub.get(value, 0) | power2(off)
+
+    def _unindex_value(self, seg: Segment, col_name: str, value, off: int):
+
+        sub = seg.index[col_name]
+        if value in sub:
+            sub[value] &= ~power2(off)
+            if sub[value] == 0:
+                del sub[value]
+
+    def set(self, slot: int, col_name: str, value):
+
+        k, off = self._locate(slot)
+        seg = self.segments[k]
+        ci = self.slot_for_col(col_name)
+
+        old_value = seg.store[ci][off]
+        seg.store[ci][off] = value
+        seg.changed[ci] |= power2(off)
+        self._version += 1
+
+        if col_name in self._indexed:
+            self._unindex_value(seg, col_name, old_value, off)
+            self._index_value(seg, col_name, value, off)
+
+    def _upsert_apply(self, updates: list) -> tuple:
+        """Through set(), rows live in segments, not self.store."""
+
+        return self._upsert_set(updates)
+
+    def _append_row(self, row: list):
+
+        if len(self.segments) == 0 or self.segments[-1].length >= self.segment_size:
+            seg = Segment(len(self.column_names))
+            for col_name in self._indexed:
+                seg.index[col_name] = {}
+            self.segments.append(seg)
+            self._starts.append(self._count)
+
+        seg = self.segments[-1]
+        off = seg.length
+        bit = power2(off)
+
+        for i, v in enumerate(row):
+            seg.store[i].append(v)
+            seg.changed[i] |= bit
+
+        for col_name in self._indexed:
+            self._index_value(seg, col_name, row[self.slot_for_col(col_name)], off)
+
+        self._count += 1
+        self._version += 1
+
+    def append(self, in_list: list = None):
+
+        if in_list is None:
+            raise ListStoreError("Append: list passed can not be None")
+
+        if len(in_list) != len(self.column_names):
+            if self.defaults:
+                in_list = self.resolve_defaults(in_list)
+            else:
+                raise ListStoreError(
+                    "Append: List missing values and no defaults defined."
+                )
+
+        self._append_row(list(in_list))
+
+    def extend(self, list_of_lists: list = None):
+        """Resolve defaults for all rows first, an error means no update."""
+
+        if list_of_lists is None or not isinstance(list_of_lists, (list, tuple)):
+            raise ListStoreError("Extend: No input list or tuple provided.")
+
+        errs = []
+        new_list = []
+        for lst in list_of_lists:
+            try:
+                new_list.append(self.resolve_defaults(lst))
+            except Exception as e:
+                errs.append(e)
+
+        if len(errs) > 0:
+            raise ListStoreError("Extend Error: Not enough values or defaults", errs)
+
+        for row in new_list:
+            self._append_row(list(row))
+
+    def pop(self, slot: int) -> tuple:
+        """Remove row, shifting only its segment's lists and masks."""
+
+        k, off = self._locate(slot)
+        seg = self.segments[k]
+
+        row = [ column.pop(off) for column in seg.store ]
+
+        for i in range(len(seg.changed)):
+            seg.changed[i] = bit_remove(seg.changed[i], off)
+
+        for col_name, sub in seg.index.items():
+            value = row[self.slot_for_col(col_name)]
+            if value in sub:
+                sub[value] &= ~power2(off)
+                if sub[value] == 0:
+                    del sub[value]
+            for v in sub:
+                sub[v] = bit_remove(sub[v], off)
+
+        if seg.length == 0:
+            del self.segments[k]
+            del self._starts[k]
+        else:
+            k += 1
+
+        for j in range(k, len(self._starts)):
+            self._starts[j] -= 1
+
+        self._count -= 1
+        self._version += 1
+
+        return self.ntuple_factory(*row)
+
+    def compact(self):
+        """Repack into full segments after many pops, rebuild segment indexes."""
+
+        rows = [ list(row) for seg in self.segments for row in zip(*seg.store) ]
+        changed = self.changed
+
+        self.clear()
+
+        for row in rows:
+            self._append_row(row)
+
+        for seg, start in zip(self.segments, self._starts):
+            seg.changed = [ (m >> start) & ((1 << seg.length) - 1) for m in changed ]
+
+        self.reindex()
+
+    def clear(self):
+
+        self.segments = []
+        self._starts = []
+        self._count = 0
+        self._version += 1
+
+    def snapshot(self):
+        raise ListStoreError("SegmentStore: snapshot not supported.")
+
+    def open_cursor(self, name: str, from_start: bool = False):
+        raise ListStoreError("SegmentStore: change cursors not supported.")
+
+    def set_orderer(self, orderer_cls=None):
+        raise ListStoreError("SegmentStore: sort orders not supported.")
+
+    """ Index, per segment """
+
+    def set_indexer(self, indexer_cls: 'IndexerClass' = None, usertypes: list = None):
+        """Keep Indexer class and indexable types, usertypes added as for
+           ListStore.set_indexer, the masks themselves live in segments."""
+
+        if not indexer_cls or not isinstance(indexer_cls, type):
+            raise ListStoreError('Set index function needs Indexer class.')
+
+        self._index_cls = indexer_cls
+        # an Indexer without a store, only for its indexable types
+        self._indexable = indexer_cls(self.column_names, None,
+                                      usertypes if usertypes else [])._indexable
+
+    def _index_list(self, column: list) -> dict:
+        """Value -> mask for a segment column, as Indexer.index_list, with
+           this store's indexable types."""
+
+        sub = {}
+        bit = 1
+        for value in column:
+            if type(value) in self._indexable:
+                sub[value] = sub.get(value, 0) | bit
+            bit <<= 1
+
+        return sub
+
+    def index_attr(self, attr_name: str):
+
+        if not self._index_cls:
+            return
+
+        ci = self.slot_for_col(attr_name)
+
+        for seg in self.segments:
+            seg.index[attr_name] = self._index_list(seg.store[ci])
+
+        if attr_name not in self._indexed:
+            self._indexed.append(attr_name)
+
+    def drop_attr(self, attr_name: str):
+
+        if attr_name in self._indexed:
+            self._indexed.remove(attr_name)
+            for seg in self.segments:
+                del seg.index[attr_name]
+
+    def reindex(self):
+
+        for attr_name in self._indexed:
+            self.index_attr(attr_name)
+
+    def ireindex(self, chunk_size: int = None):
+        """Chunked reindex, a segment at a time, yields rows done."""
+
+        if not self._index_cls:
+            return
+
+        version = self._version
+
+        for col_name in self._indexed:
+            ci = self.slot_for_col(col_name)
+            for seg, start in zip(self.segments, self._starts):
+                self._check_version(version, 'Reindex')
+                seg.index[col_name] = self._index_list(seg.store[ci])
+                yield start + seg.length
+
+    def idump(self, chunk_size: int = None):
+        """Chunked dump, a list of rows per segment."""
+
+        for seg in self.segments:
+            yield [ self.ntuple_factory(*row) for row in zip(*seg.store) ]
+
+    def index_mask(self, col_name: str, value) -> int:
+        """Row mask for one indexed value, combined from segments."""
+
+        mask = 0
+        for seg, start in zip(self.segments, self._starts):
+            mask |= seg.index[col_name].get(value, 0) << start
+
+        return mask
+
+    def _index_groups(self, col_name: str) -> dict:
+
+        if col_name not in self._indexed:
+            return None
+
+        groups = {}
+        for seg, start in zip(self.segments, self._starts):
+            for v, m in seg.index[col_name].items():
+                groups[v] = groups.get(v, 0) | (m << start)
+
+        return groups
+
+    @property
+    def index(self) -> dict:
+        """Combined index, computed on access, prefer index_mask()."""
+
+        if self._indexed:
+            return { col: self._index_groups(col) for col in self._indexed }
+
+    """ Memory accounting, per segment """
+
+    def _column_bytes(self, col_slot: int) -> int:
+
+        return sum([ values_size(seg.store[col_slot]) for seg in self.segments ])
+
+    def _changed_bytes(self) -> int:
+
+        return sum([ values_size(seg.changed) for seg in self.segments ])
+
+    def _index_report(self) -> dict:
+
+        report = {}
+        for col_name in self._indexed:
+            subs = [ seg.index[col_name] for seg in self.segments ]
+            report[col_name] = { 'masks': sum([ len(sub) for sub in subs ]),
+                                 'bytes': sum([ sizeof(sub) + sum([ sizeof(m) for m in sub.values() ])
+                                                for sub in subs ]) }
+
+        return report
@@ -0,0 +1,284 @@
+"""
+module:     storeio
+version:    v0.4.4
+sourcecode: https://github.com/billbreit/BitWiseApps
+copyleft:   2024 by Bill Breitmayer
+licence:    GNU GPL v3 or above
+author:     Bill Breitmayer
+
+Streaming CSV and NDJSON ( one JSON value per line ) import and export for
+ListStore, TupleStore, TableStore and the like.
+
+Import reads a line at a time and extends the store in batches of
+batch_size rows, so memory is bounded by the batch, not the file.  Short
+rows are filled from store defaults, resolved once per batch, so a
+callable default like timestamp is called once per batch, not per row.
+With TableStore, each batch goes through extend() with full validation.
+
+Export reads a row at a time with get_row and writes one line per row,
+optionally only rows in a mask, memory is bounded by the row.
+
+n = import_csv(readings, 'readings.csv', types=[str, float, int])
+n = export_ndjson(readings, 'hot.ndjson', mask=readings.where('temp', 'gt', 30.0))
+
+CSV fields are strings, types is a list of converters, one per column,
+None for no conversion.  For TableStore, types default to column ptypes.
+An empty field converts to None, except for str columns.  On micropython,
+a simple CSV parser is used, a quoted field can't span lines.
+"""
+
+import json
+
+try:
+    import csv
+except ImportError:   # not in mpy
+    csv = None
+
+try:
+    from core.bitops import bit_indexes
+except ImportError:
+    from lib.core.bitops import bit_indexes
+
+
+class StoreIOError(Exception):
+    pass
+
+
+# rows per extend() on import
+BATCH_SIZE = 256
+
+
+""" CSV fields """
+
+def _parse_csv_line(line: str) -> list:
+    """Split one CSV line, handles quoted fields and doubled quotes."""
+
+    fields = []
+    field = []
+    quoted = False
+    i = 0
+    n = len(line)
+
+    while i < n:
+        c = line[i]
+        if quoted:
+            if c == '"':
+                if i + 1 < n and line[i + 1] == '"':
+                    field.append('"')
+                    i += 1
+                else:
+                    quoted = False
+            else:
+                field.append(c)
+        elif c == '"':
+            quoted = True
+        elif c == ',':
+            fields.append(''.join(field))
+            field = []
+        else:
+            field.append(c)
+        i += 1
+
+    fields.append(''.join(field))
+
+    return fields
+
+def _csv_field(value) -> str:
+
+    if value is None:
+        return ''
+
+    s = str(value)
+
+    if ',' in s or '"' in s or '\n' in s or '\r' in s:
+        return '"' + s.replace('"', '""') + '"'
+
+    return s
+
+def _to_bool(s: str) -> bool:
+
+    if s in ('True', 'true', '1'):
+        return True
+    if s in ('False', 'false', '0'):
+        return False
+
+    raise StoreIOError(f"CSV: '{s}' is not a bool.")
+
+def _converter(ptype):
+    """Converter for a column type, None if values stay str."""
+
+    if ptype is None or ptype is str:
+        return None
+
+    if ptype is bool:
+        return _to_bool
+
+    if ptype in (int, float):
+        return ptype
+
+    return None   # other types stay str, TableStore validation will tell
+
+def _convert(fields: list, converters: list) -> list:
+
+    row = []
+
+    for value, conv in zip(fields, converters):
+        if conv is None:
+            row.append(value)
+        elif value == '':
+            row.append(None)
+        else:
+            try:
+                row.append(conv(value))
+            except (ValueError, TypeError) as e:
+                raise StoreIOError(f"CSV: can't convert '{value}'. {e}")
+
+    return row
+
+
+""" Readers, generators of rows """
+
+def read_csv(file, types: list = None, header: bool = True):
+    """Yield rows of converted values from an open text file.  If header,
+       the first line is skipped."""
+
+    if csv:
+        lines = csv.reader(file)
+    else:
+        lines = ( _parse_csv_line(line.rstrip('\r\n')) for line in file )
+
+    first = True
+    for fields in lines:
+        if first and header:
+            first = False
+            continue
+        first = False
+        if not fields or fields == ['']:
+            continue
+        if types:
+            fields = _convert(fields, [ _converter(t) for t in types ] + [None] * (len(fields) - len(types)))
+        yield fields
+
+def read_ndjson(file, column_names: list):
+    """Yield rows from an open text file, one JSON list or object per line.
+       An object row is taken in column order, it may only omit trailing
+       columns, which get defaults."""
+
+    for line in file:
+        line = line.strip()
+        if not line:
+            continue
+        value = json.loads(line)
+        if isinstance(value, dict):
+            row = []
+            for col in column_names:
+                if col not in value:
+                    break
+                row.append(value[col])
+            if len(row) < len(value):
+                raise StoreIOError(f"NDJSON: object keys {list(value.keys())} not leading columns of {column_names}.")
+            value = row
+        yield value
+
+
+""" Import, batched """
+
+def import_rows(store, rows, batch_size: int = BATCH_SIZE) -> int:
+    """Extend store from an iterable of rows, batch_size rows at a time.
+       Returns number of rows imported.  An error stops the import, rows
+       in earlier batches stay in the store."""
+
+    ncols = len(store.column_names)
+    fix_types = getattr(store, 'fix_types', None)   # TableStore, list -> tuple
+    count = 0
+    batch = []
+
+    def flush(batch):
+        # defaults once per batch, callables called once
+        fill = [ d() if callable(d) else d for d in store.defaults ]
+        for i, row in enumerate(batch):
+            if len(row) < ncols:
+                need = ncols - len(row)
+                if need > len(fill):
+                    raise StoreIOError(f"Import: row {count + i} missing values and not enough defaults.")
+                batch[i] = list(row) + fill[-need:]
+        if fix_types:
+            batch = fix_types(batch)
+        store.extend(batch)
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush(batch)
+            count += len(batch)
+            batch = []
+
+    if batch:
+        flush(batch)
+        count += len(batch)
+
+    return count
+
+def import_csv(store, filename: str, types: list = None, header: bool = True,
+               batch_size: int = BATCH_SIZE) -> int:
+    """Import CSV file into store, returns rows imported."""
+
+    if types is None:
+        types = getattr(store, 'ptypes', None)
+
+    with open(filename, 'rt') as file:
+        return import_rows(store, read_csv(file, types, header), batch_size)
+
+def import_ndjson(store, filename: str, batch_size: int = BATCH_SIZE) -> int:
+    """Import NDJSON file into store, returns rows imported."""
+
+    with open(filename, 'rt') as file:
+        return import_rows(store, read_ndjson(file, store.column_names), batch_size)
+
+
+""" Export, straight from the columns """
+
+def _export_rows(store, columns: list, mask: int):
+    """Yield rows of values for columns, all rows or only rows in mask.
+       A row at a time through get_row, no column copies, so memory stays
+       flat for RingStore, SegmentStore and NumpyStore too."""
+
+    cis = [ store.slot_for_col(c) for c in (columns or store.column_names) ]
+    slots = range(store.length) if mask is None else bit_indexes(mask)
+
+    for slot in slots:
+        row = store.get_row(slot)
+        yield [ row[ci] for ci in cis ]
+
+def export_csv(store, filename: str, columns: list = None, header: bool = True,
+               mask: int = None) -> int:
+    """Write store rows, or rows in mask, to a CSV file, returns rows written.
+       Values are written as str(value), None as an empty field."""
+
+    columns = columns or store.column_names
+    count = 0
+
+    with open(filename, 'wt') as file:
+        if header:
+            file.write(','.join([ _csv_field(c) for c in columns ]) + '\n')
+        for row in _export_rows(store, columns, mask):
+            file.write(','.join([ _csv_field(v) for v in row ]) + '\n')
+            count += 1
+
+    return count
+
+def export_ndjson(store, filename: str, columns: list = None, mask: int = None,
+                  as_objects: bool = True) -> int:
+    """Write store rows, or rows in mask, to an NDJSON file, one JSON object
+       per line, or a list if not as_objects.  Returns rows written."""
+
+    columns = columns or store.column_names
+    count = 0
+
+    with open(filename, 'wt') as file:
+        for row in _export_rows(store, columns, mask):
+            value = dict(zip(columns, row)) if as_objects else list(row)
+            file.write(json.dumps(value) + '\n')
+            count += 1
+
+    return count
@@ -54,16 +54,48 @@ import json
 from collections import namedtuple, OrderedDict
 
 try:
-    from tuplestore import TupleStore, datetime, timestamp  # try abs
+    from tuplestore import TupleStore, ListStoreError, UpsertCount, SCAN_CHUNK, datetime, timestamp  # try abs
     # print('abs path found')
 except ImportError:
-    from lib.tuplestore import TupleStore, datetime, timestamp
+    from lib.tuplestore import TupleStore, ListStoreError, UpsertCount, SCAN_CHUNK, datetime, timestamp
 
 try:
     from core.fsutils import path_exists, path_separator
 except ImportError:
     from lib.core.fsutils import path_exists, path_separator
 
+try:
+    from core.bitops import bitslice_insert, bit_indexes
+except ImportError:
+    from lib.core.bitops import bitslice_insert, bit_indexes
+
+try:
+    from binascii import crc32 as checksum
+except ImportError:   # mpy port built without crc32
+
+    def checksum(data:bytes, value:int=1 ) -> int:
+        """Adler-32, stand-in for crc32, value to continue a running sum."""
+
+        a, b = value & 0xffff, value >> 16
+        for c in data:
+            a = (a + c) % 65521
+            b = (b + a) % 65521
+        return (b << 16) | a
+
+def file_checksum(path:str, chunk_size:int=1024 ) -> int:
+    """checksum of a file, read a chunk at a time, None if missing."""
+
+    value = checksum(b'')
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return value
+                value = checksum(chunk, value)
+    except OSError:
+        return None
+
 
 """TableDef - Table Definition,
      tname:str, used for tuple name, and if subclassed and used in db,
@@ -89,6 +121,75 @@ ColDef = namedtuple('ColDef', CDef_fields )
 class TableStoreError(Exception):
     pass
 
+
+""" Columnar file format, save(columnar=True),
+    { "format": "columns", "names": [ cname, ... ], "columns": [ encoded, ... ] }
+    encoded column is one of:
+        [ v, v, ... ]                                    plain
+        { "runs": [ [ v, count ], ... ] }                run-length
+        { "values": [ v, ... ], "codes": [ i, ... ] }    dictionary
+    Only columns of hashable ( immutable ) values are encoded, so a decoded
+    repeat never aliases a mutable value.  Columns load without a transpose
+    to rows, validated per column unless trusted.
+"""
+
+COLUMNAR = 'columns'
+
+# change cursor name for the journal
+JOURNAL = '_journal'
+
+def encode_column(values:list):
+    """Run-length if runs are long, dictionary if few distinct values, else
+       the plain list.  Values of different types never merge, 1 and True."""
+
+    n = len(values)
+    if n < 8:
+        return values
+
+    try:
+        codes = {}
+        for v in values:
+            codes.setdefault((type(v), v), len(codes))
+    except TypeError:   # unhashable, list or dict
+        return values
+
+    runs = []
+    prev = None
+    for v in values:
+        if runs and v == prev and type(v) is type(prev):
+            runs[-1][1] += 1
+        else:
+            runs.append([v, 1])
+            prev = v
+
+    if len(runs) * 2 <= n // 2:
+        return { 'runs': runs }
+
+    if len(codes) <= n // 2:
+        ordered = [None] * len(codes)
+        for (_, v), i in codes.items():
+            ordered[i] = v
+        return { 'values': ordered, 'codes': [ codes[(type(v), v)] for v in values ] }
+
+    return values
+
+def decode_column(encoded) -> list:
+
+    if isinstance(encoded, list):
+        return encoded
+
+    if 'runs' in encoded:
+        values = []
+        for v, count in encoded['runs']:
+            values.extend([v] * count)
+        return values
+
+    if 'values' in encoded:
+        dvalues = encoded['values']
+        return [ dvalues[i] for i in encoded['codes'] ]
+
+    raise TableStoreError(f"Decode Column: unknown encoding {list(encoded.keys())}.")
+
 class TableStore(TupleStore):
 
     _tdef:TableDef = None   # If _tdef not None, TableStore is subclassed.
@@ -120,10 +221,21 @@ class TableStore(TupleStore):
         super().__init__(self.tdef.tname, col_names, defaults)
         
         self.ptypes:list[type] = [ c.ptype for c in self.tdef.col_defs]
+
+        # compiled type checks per column, None if any value passes,
+        # and ( slot, check ) pairs for validate_types
+        self._checks:list = [ self.compile_validator(pt) for pt in self.ptypes ]
+        self._validators:list[tuple] = [ (i, c) for i, c in enumerate(self._checks) if c ]
         
         self.db:'DataStore' = db  # if TableStore used in DataStoreDef, table with parent/child key relations. 
         self._prelations:list[PRelation] = []  # as parent to child
         self._crelations:list[CRelation] = []  # as child to parent
+        self._prefs:list['RelationKeys'] = []  # db key counts, same order as _prelations
+        self._crefs:list['RelationKeys'] = []  # ditto _crelations
+        
+        self._generation:int = 0      # save count, from .chk, matches journal header
+        self._journal_live:bool = False  # .log file belongs to this session's state
+        self._snapshot_sum:int = None    # checksum of .json loaded or saved, journal header
     
     def __del__(self):
         """ Remove tangle of references, in mpy del is called by gc.collect"""
@@ -131,6 +243,8 @@ class TableStore(TupleStore):
         self.db = None   # del circular ref.
         self._prelations = None  # table class instances
         self._crelations = None
+        self._prefs = None
+        self._crefs = None
 
     def _postinit(self):
         """Handle for db to late initialize, avoids forward/circular reference."""
@@ -142,6 +256,9 @@ class TableStore(TupleStore):
             # child to parent, answers table row parents_exist ?
             self._crelations = [ CRelation( r.ccol, self.db.tabledict[r.parent], r.pcol  )
                                     for r in self.db.relations if r.child == self.tablename ]
+            # maintained key counts, shared with the table on the other side
+            self._prefs = [ self.db.relation_keys[r] for r in self.db.relations if r.parent == self.tablename ]
+            self._crefs = [ self.db.relation_keys[r] for r in self.db.relations if r.child == self.tablename ]
     
     @classmethod
     def _constructor( cls ):
@@ -250,6 +367,45 @@ class TableStore(TupleStore):
             
         return x
 
+    @classmethod
+    def compile_validator(cls, ptype ):
+        """Compile a check(value) -> bool for a column type, once per table,
+           or None if any value passes the type constructor, like str.
+           isinstance() first, no exception on the success path, an arity
+           check for namedtuples, test_type() only as the fallback for
+           values that may convert, an int for a float column say."""
+
+        if ptype in (str, bool):
+            return None
+
+        if tuple in ptype.__bases__:  # is namedtuple
+            try:
+                arity = len(ptype._fields)
+            except AttributeError:    # mpy, no _fields
+                arity = None
+            if arity is not None:
+                def check(value):
+                    return isinstance(value, (tuple, list)) and len(value) == arity
+                return check
+
+        if ptype is float:
+            fast = (float, int)
+        elif ptype is tuple:
+            fast = (tuple, list)
+        else:
+            fast = ptype
+
+        def check(value):
+            if isinstance(value, fast):
+                return True
+            try:
+                cls.test_type(ptype, value)
+            except TableStoreError:
+                return False
+            return True
+
+        return check
+
     def check_column_types(self, col_name:str, col_values:list=None ) -> list:
         """Validate an entire column. Faster than validate_rows ? 
            If not col_vals, use col_name in table store"""
@@ -261,15 +417,37 @@ class TableStore(TupleStore):
             col_from_db = False
         
         ptype = self.ptypes[self.slot_for_col(col_name)]
+        check = self._checks[self.slot_for_col(col_name)]
         
-        err_list = []
-        for val in col_values:
-            try:
-                self.test_type(ptype, val)
-            except:
-                err_list.append(f"Validation Error: value '{val}' must be type {ptype}")
+        if check is None:
+            return []
         
-        return err_list
+        return [ f"Validation Error: value '{val}' must be type {ptype}"
+                 for val in col_values if not check(val) ]
+
+    def icheck_column_types(self, col_name:str, col_values:list=None, chunk_size:int=SCAN_CHUNK ):
+        """Chunked form of check_column_types, yields the running error list
+           after each chunk of values, the last list yielded is the result."""
+
+        if col_values is None:
+            col_values = self.get_column(col_name)
+
+        ptype = self.ptypes[self.slot_for_col(col_name)]
+        check = self._checks[self.slot_for_col(col_name)] or (lambda val: True)
+
+        err_list = []
+        start = 0
+
+        while start < len(col_values):
+            end = min(start + chunk_size, len(col_values))
+            for val in col_values[start:end]:
+                if not check(val):
+                    err_list.append(f"Validation Error: value '{val}' must be type {ptype}")
+            start = end
+            yield err_list
+
+        if len(col_values) == 0:
+            yield err_list
         
     def validate_types(self, list_in:[list, tuple]) -> list:
         """Test a row of values against Python types for each column.
@@ -279,11 +457,9 @@ class TableStore(TupleStore):
             raise TableStoreError('Invalid List: must provide list, not None or empty')
             
         err_list = []
-        for pt, v in zip(self.ptypes, list_in):
-            try:
-                self.test_type(pt, v)
-            except TableStoreError as e:
-                err_list.append(f"Validation Error: value '{v}' must be type {pt}")
+        for i, check in self._validators:
+            if i < len(list_in) and not check(list_in[i]):
+                err_list.append(f"Validation Error: value '{list_in[i]}' must be type {self.ptypes[i]}")
                 
         return err_list
         
@@ -303,6 +479,15 @@ class TableStore(TupleStore):
             # other types ?
                     
         return data
+
+    def fix_column_types(self, columns:list[list] ) -> list[list]:
+        """As fix_types, for a list of columns, tuples restored from JSON."""
+
+        for i, pt in enumerate(self.ptypes):
+            if pt is tuple or tuple in pt.__bases__:
+                columns[i] = [ tuple(v) for v in columns[i] ]
+
+        return columns
         
     """ Integrity Constraints """
     
@@ -314,11 +499,11 @@ class TableStore(TupleStore):
   
         if self.db:
             rrow = self.resolve_defaults(row)
-            for ccol, par, pcol in self._crelations:
+            for (ccol, par, pcol), refs in zip(self._crelations, self._crefs):
  
                 pkey = rrow[self.slot_for_col(ccol)]
                 
-                if par.find(pcol, pkey) < 0:   # may be unique or not, need compund key ? 
+                if pkey not in refs.parents:   # may be unique or not, need compund key ? 
                     errors.append(f"Invalid Parent Key: key '{pkey}' has no parent key in {par.tablename} table") 
                     
         return errors
@@ -342,10 +527,10 @@ class TableStore(TupleStore):
 
         if self.db:
             rrow = self.resolve_defaults(row)
-            for pcol, child, ccol in self._prelations:
+            for (pcol, child, ccol), refs in zip(self._prelations, self._prefs):
 
                 ckey = rrow[self.slot_for_col(pcol)]
-                num_ch = len(child.find_all(ccol, ckey))
+                num_ch = refs.children.get(ckey, 0)
                 
                 if num_ch > 0:   # has children 
                     info.append(f"Child Key Dependency: key '{ckey}' has {num_ch} children in {child.tablename} table.") 
@@ -397,7 +582,18 @@ class TableStore(TupleStore):
         - check references if table is part of a DataStore
             - no row add without parent keys
             - no row remove when existing children
+        - in a db.transaction(), only types are checked per update, keys
+          and references once at commit, see Transaction
     """ 
+
+    def _deferred(self) -> bool:
+        """In a db transaction, saves table state for rollback on first
+           update and returns True, key and reference checks wait for commit."""
+
+        if self.db and self.db._tx:
+            self.db._tx.touch(self)
+            return True
+        return False
         
     def set(self, key:list, col_name:str, value ):
         """Set col_name (attr) in slot int to value.  If key val altered,
@@ -405,8 +601,9 @@ class TableStore(TupleStore):
         
         
         rrow = list(self.get_key(key)) # need to de-tuple   
+        deferred = self._deferred()
         
-        if col_name in self.unique_columns:  # equivalent to rename (delete/add ) row
+        if col_name in self.unique_columns and not deferred:  # equivalent to rename (delete/add ) row
             key_changed = True
             ch_list = self.validate_children(rrow)
         
@@ -417,25 +614,38 @@ class TableStore(TupleStore):
                     
         rrow[self.slot_for_col(col_name)] = value
         
-        err_list = self.validate_row(rrow, add=key_changed)
+        if deferred:
+            err_list = self.validate_types(rrow)
+        else:
+            err_list = self.validate_row(rrow, add=key_changed)
         
         if len(err_list) > 0:
             raise TableStoreError(f"Set Error: Invalid value {value} for {col_name}: ", err_list)
             
-        super().set(self.find_unique(key), col_name, value )
+        slot = self.find_unique(key)
+        old_row = list(self.get_row(slot))
+        
+        super().set(slot, col_name, value )
+        
+        self._track_keys([old_row], -1)
+        self._track_keys([rrow], 1)
 
 
     def append(self, list_in:list=None ):
         """Append to store a row/list."""
     
-            
-        err_list = self.validate_row(list_in)
+        if self._deferred():
+            err_list = self.validate_types(self.resolve_defaults(list_in))
+        else:
+            err_list = self.validate_row(list_in)
         
         if len(err_list) > 0:
             raise TableStoreError('Append: Invalid List: ', err_list)
             
         super().append(list_in)
         
+        self._track_keys([self.get_row(self.length - 1)], 1)
+        
     def extend(self, list_of_lists:list=None):
         """Extend store with list of lists/rows.  Something like a transaction,
            if one fails, all fail. """ 
@@ -443,37 +653,331 @@ class TableStore(TupleStore):
         if list_of_lists is None or len(list_of_lists)==0:
             raise TableStoreError('Extend - list passed can not be None or empty.')
             
+        rows = [ self.resolve_defaults(r) for r in list_of_lists ]
+        
+        if self._deferred():
+            err_list = self.validate_rows(rows, keys=False, parents=False)
+            if any(err_list):
+                raise TableStoreError('Extend - invalid rows, no update: ', err_list)
+            super().extend(rows)
+            self._track_keys(rows, 1)
+            return
+        
         # test list for duplicates
-        unique_keys = { tuple(self.make_key(r)) for r in list_of_lists }
-        if len(unique_keys) != len(list_of_lists):
+        key_slots = [ self.slot_for_col(k) for k in self.unique_columns ]
+        batch_keys = [ tuple([ r[ks] for ks in key_slots ]) for r in rows ]
+        if len(set(batch_keys)) != len(batch_keys):
             raise TableStoreError('Extend - duplicate keys within input list.') 
     
-        err_list = [ e for e in map(self.validate_row, list_of_lists) if e ]  # if e != []
+        err_list = self.validate_rows(rows, batch_keys)
 
         if any(err_list):
             raise TableStoreError('Extend - invalid rows, no update: ', err_list)
             
-        super().extend(list_of_lists)
+        super().extend(rows)
+        
+        self._track_keys(rows, 1)
+
+    def validate_rows(self, rows:list, batch_keys:list=None, keys:bool=True,
+                      parents:bool=True ) -> list:
+        """Bulk form of validate_row for new rows, defaults resolved.  Builds
+           the set of existing keys once, checks types a column at a time
+           and parent keys against one set per relation, no scan per row.
+           batch_keys, tuples of key values per row, if already made.
+           keys and parents False skip those checks, types only.
+           Returns list of errors, empty if all valid."""
+
+        errors = []
+
+        # uniqueness
+        if keys:
+            if batch_keys is None:
+                key_slots = [ self.slot_for_col(k) for k in self.unique_columns ]
+                batch_keys = [ tuple([ r[ks] for ks in key_slots ]) for r in rows ]
+            existing = set(zip(*[ self.store[self.slot_for_col(k)] for k in self.unique_columns ]))
+            for key in batch_keys:
+                if key in existing:
+                    errors.append(f"Validation Add Error: key '{list(key)}' is duplicate.")
+
+        # types, a column at a time
+        for i, check in self._validators:
+            errors.extend([ f"Validation Error: value '{r[i]}' must be type {self.ptypes[i]}"
+                            for r in rows if not check(r[i]) ])
+
+        # referential integrity
+        for cs, pkeys, ptable in (self._parent_sets() if parents else []):
+            errors.extend([ f"Invalid Parent Key: key '{r[cs]}' has no parent key in {ptable} table"
+                            for r in rows if r[cs] not in pkeys ])
+
+        return errors
+
+    def validate_columns(self, columns:list[list] ) -> list:
+        """validate_rows for new rows given as full columns, a columnar
+           load.  Keys against the table and each other, types with the
+           compiled checks and parent keys, a column at a time.
+           Returns list of errors, empty if all valid."""
+
+        errors = []
+
+        # uniqueness
+        existing = set(zip(*[ self.store[self.slot_for_col(k)] for k in self.unique_columns ]))
+        for key in zip(*[ columns[self.slot_for_col(k)] for k in self.unique_columns ]):
+            if key in existing:
+                errors.append(f"Validation Add Error: key '{list(key)}' is duplicate.")
+            existing.add(key)
+
+        # types
+        for i, check in self._validators:
+            errors.extend([ f"Validation Error: value '{v}' must be type {self.ptypes[i]}"
+                            for v in columns[i] if not check(v) ])
+
+        # referential integrity
+        for cs, pkeys, ptable in self._parent_sets():
+            errors.extend([ f"Invalid Parent Key: key '{v}' has no parent key in {ptable} table"
+                            for v in columns[cs] if v not in pkeys ])
+
+        return errors
+
+    def _parent_sets(self) -> list[tuple]:
+        """( child slot, set of parent keys, parent tablename ) per relation
+           as child, for bulk checks."""
+
+        if not self.db:
+            return []
+
+        return [ (self.slot_for_col(ccol), refs.parents, par.tablename)
+                 for (ccol, par, pcol), refs in zip(self._crelations, self._crefs) ]
+
+    def _track_keys(self, rows:list, delta:int ):
+        """Count rows added ( delta 1 ) or removed ( -1 ) in the db relation
+           key counts, as parent and as child.  Rows are full rows."""
+
+        if self.db and rows:
+            self._track_columns(list(zip(*rows)), delta)
+
+    def _track_columns(self, columns:list, delta:int ):
+        """As _track_keys, for rows as a list of columns."""
+
+        if not self.db:
+            return
+
+        for (pcol, _, _), refs in zip(self._prelations, self._prefs):
+            for v in columns[self.slot_for_col(pcol)]:
+                refs.count(refs.parents, v, delta)
+
+        for (ccol, _, _), refs in zip(self._crelations, self._crefs):
+            for v in columns[self.slot_for_col(ccol)]:
+                refs.count(refs.children, v, delta)
+
+    def upsert_many(self, rows:list, key_columns:list=None ) -> UpsertCount:
+        """Update rows with a key in the table, append rows with a new key.
+           Key columns must be the unique key, the default.  All rows are
+           validated first, types and parent keys, if one fails, all fail.
+           Parent keys are checked against one set per relation, not a
+           find() per row.  Returns UpsertCount(inserted, updated, unchanged)."""
+
+        if key_columns is None:
+            key_columns = self.unique_columns
+
+        if list(key_columns) != list(self.unique_columns):
+            raise TableStoreError(f"Upsert: key columns {key_columns} must be unique key {self.unique_columns}.")
+
+        try:
+            updates, inserts = self._upsert_split(rows, key_columns)
+        except ListStoreError as e:
+            raise TableStoreError(f"Upsert: {e}")
+
+        parent_sets = [] if self._deferred() else self._parent_sets()
+
+        err_list = []
+        for rrow in inserts + [ r for _, r in updates ]:
+            err_list.extend(self.validate_types(rrow))
+            for cs, pkeys, ptable in parent_sets:
+                if rrow[cs] not in pkeys:
+                    err_list.append(f"Invalid Parent Key: key '{rrow[cs]}' has no parent key in {ptable} table")
+
+        if len(err_list) > 0:
+            raise TableStoreError('Upsert - invalid rows, no update: ', err_list)
+
+        if self.db:
+            self._track_keys([ self.get_row(slot) for slot, _ in updates ], -1)
+
+        updated, unchanged = self._upsert_apply(updates)
+
+        if self.db:
+            self._track_keys([ self.get_row(slot) for slot, _ in updates ], 1)
+
+        if len(inserts) > 0:
+            TupleStore.extend(self, inserts)   # validated, keys new and distinct
+            self._track_keys(inserts, 1)
+
+        return UpsertCount(len(inserts), updated, unchanged)
 
         
-    def pop(self, key:list ) -> tuple:
+    def pop(self, key:list, cascade:bool=False ) -> tuple:
         """Remove row from TableStore and return row.  Do not allow pop if parent
-            row has existing children in related tables. """
+            row has existing children in related tables.  If cascade, child
+            rows go too, and their children, in one db transaction. """
+        
+        if cascade and self.db:
+            slot = self.find_unique(key)
+            if slot < 0:
+                raise TableStoreError(f"Pop Error: key '{key}' not found in {self.tablename}.")
+            with self._transaction():
+                return self._cascade_pop([slot])[0]
         
         rrow = self.get_key(key)
-        ch_list = self.validate_children(rrow)
+        ch_list = [] if self._deferred() else self.validate_children(rrow)
         
         if len(ch_list) > 0:
             raise TableStoreError(f"Pop Error: key '{key}' has dependent children. {ch_list}.")  
         
         row = super().pop(self.find_unique(key))
         
+        self._track_keys([row], -1)
+        
         return row
+
+    def clear(self):
+        """Empty table, and its keys from db relation key counts."""
+
+        self._deferred()
+
+        if self.db and self.length > 0:
+            self._track_columns(self.store, -1)
+
+        super().clear()
         
     def rename(self, oldkey:list, newkey:list ):
-        """Rename row unique key and keys in dependent children. Needed ? """ 
+        """Change row unique key to newkey, child rows referring to a changed
+           key column follow, and their children if the column is in their
+           key.  Keys and references are checked once, at the end, if one
+           fails, all fail."""
+        
+        if isinstance(oldkey, str): oldkey = [oldkey]
+        if isinstance(newkey, str): newkey = [newkey]
         
-        pass
+        if len(newkey) != len(self.unique_columns):
+            raise TableStoreError(f'Rename Error: length of key {newkey} must be {len(self.unique_columns)}.')
+        
+        slot = self.find_unique(oldkey)
+        if slot < 0:
+            raise TableStoreError(f"Rename Error: key '{oldkey}' not found in {self.tablename}.")
+        
+        if not self.db:
+            if list(newkey) != list(oldkey) and self.is_duplicate(newkey):
+                raise TableStoreError(f"Rename Error: key '{newkey}' is duplicate.")
+            self._rename(slot, newkey)
+            return
+        
+        with self._transaction():
+            self._rename(slot, newkey)
+
+    """ Cascade Methods, rename and pop(cascade=True), child rows found with
+        the db relation key counts, then the child index, if any, or a scan """
+
+    def _transaction(self) -> 'Transaction':
+        """db transaction, or a no-op context in one already."""
+
+        if self.db._tx:
+            return _InTransaction()
+
+        return self.db.transaction()
+
+    def _slots_for(self, col_name:str, value ) -> list[int]:
+
+        if self.indexer and col_name in self.index:
+            return bit_indexes(self.index[col_name].get(value, 0))
+
+        return self.find_all(col_name, value)
+
+    def _load_children(self):
+        """Load child tables still pending after a lazy db.load_all, before
+           a cascade reads their key counts or rows."""
+
+        if self.db and self.db._pending:
+            for _, child, _ in self._prelations:
+                if child.tablename in self.db._pending:
+                    self.db._materialize(child.tablename)
+
+    def _rename(self, slot:int, newkey:list ):
+
+        self._load_children()
+        self._deferred()
+
+        old_row = list(self.get_row(slot))
+        new_row = list(old_row)
+        for cname, value in zip(self.unique_columns, newkey):
+            new_row[self.slot_for_col(cname)] = value
+
+        err_list = self.validate_types(new_row)
+        if len(err_list) > 0:
+            raise TableStoreError(f"Rename Error: invalid key {newkey}: ", err_list)
+
+        # children first, parent counts still have old values
+        for (pcol, child, ccol), refs in zip(self._prelations, self._prefs):
+            ps = self.slot_for_col(pcol)
+            old, new = old_row[ps], new_row[ps]
+            # other rows with old value keep the children
+            if old != new and refs.children.get(old, 0) > 0 and refs.parents.get(old, 0) == 1:
+                child._cascade_set(child._slots_for(ccol, old), ccol, new)
+
+        for i, cname in enumerate(self.column_names):
+            if new_row[i] != old_row[i]:
+                TupleStore.set(self, slot, cname, new_row[i])
+
+        self._track_keys([old_row], -1)
+        self._track_keys([new_row], 1)
+
+    def _cascade_set(self, slots:list, col_name:str, value ):
+        """Set col_name to value in slots, as rename if col_name is a key
+           column, the change may cascade further."""
+
+        if col_name in self.unique_columns:
+            ks = self.unique_columns.index(col_name)
+            for slot in slots:
+                newkey = self.make_key(list(self.get_row(slot)))
+                newkey[ks] = value
+                self._rename(slot, newkey)
+            return
+
+        self._deferred()
+
+        old_rows = [ list(self.get_row(slot)) for slot in slots ]
+        for slot in slots:
+            TupleStore.set(self, slot, col_name, value)
+
+        self._track_keys(old_rows, -1)
+        self._track_keys([ self.get_row(slot) for slot in slots ], 1)
+
+    def _cascade_pop(self, slots:list ) -> list[tuple]:
+        """Pop rows in slots and all rows depending on them, children first.
+           Returns popped rows in slots order."""
+
+        self._load_children()
+        self._deferred()
+
+        rows = [ self.get_row(slot) for slot in slots ]
+
+        for (pcol, child, ccol), refs in zip(self._prelations, self._prefs):
+            ps = self.slot_for_col(pcol)
+            popping = {}
+            for row in rows:
+                popping[row[ps]] = popping.get(row[ps], 0) + 1
+            for value, n in popping.items():
+                # children stay while other rows have value
+                if refs.children.get(value, 0) > 0 and refs.parents.get(value, 0) == n:
+                    child._cascade_pop(child._slots_for(ccol, value))
+
+        # slot numbers shift on pop, may have moved if child is self
+        slots = [ self.find_unique(self.make_key(list(row))) for row in rows ]
+
+        for slot in sorted(slots, reverse=True):
+            TupleStore.pop(self, slot)
+
+        self._track_keys(rows, -1)
+
+        return rows
             
         
     """ Find Methods """
@@ -530,43 +1034,297 @@ class TableStore(TupleStore):
         yield from [ self.ntuple_factory(*tup) for tup in tuple(data)]
             
         
-    def load(self, filename:str=None ):
-        """Load TableStore from JSON """
+    def schema_fingerprint(self) -> int:
+        """Checksum of table name, unique key, column names and types.
+           Defaults not included, a callable default has no stable repr."""
+
+        schema = [ self.tablename, list(self.unique_columns),
+                   [ [ cn, pt.__name__ ] for cn, pt in zip(self.column_names, self.ptypes) ] ]
+
+        return checksum(json.dumps(schema).encode())
+
+    def _load_columns(self, columns:list[list] ):
+        """Trusted bulk load, extend store columns directly, no validation
+           or per row work.  Changed bits, cursors, indexes, sort orders
+           and db relation key counts are brought up to date once."""
+
+        n = len(columns[0]) if columns else 0
+        if n == 0:
+            return
+
+        save_top = self.length
+
+        for i, column in enumerate(columns):
+            self.store[i].extend(column)
+            self.changed[i] = bitslice_insert(self.changed[i], save_top, n, (1 << n) - 1)
+        self._version += 1
+
+        if self.cursors:
+            self._cursors_mark(((1 << n) - 1) << save_top)
+
+        if self.indexer and self.indexer.index:
+            self.indexer.reindex()
+
+        if self.orderer:
+            self.orderer.reorder()
+
+        self._track_columns(columns, 1)
+
+    def load(self, filename:str=None, trusted:bool=False, replay:bool=True ):
+        """Load TableStore from JSON.  If trusted, the table is empty, and
+           the .chk file written by save() matches both the file checksum
+           and the table schema, columns are loaded directly without
+           validation.  Otherwise a columnar file is validated a column at a
+           time, see validate_columns, and rows as for extend(), so loading
+           into a table with rows still checks duplicate keys.  If replay,
+           then apply the journal, db.load_all replays after all snapshots
+           are loaded. """
  
         # db will re-call table.load and provide full 'dir/filename' path
         if self.db and not filename and filename != self.filename:
-            self.db.load_all()
+            self.db.load_all(trusted)
     
         if filename:
-            fname = filename + ".json"
+            fname = filename
         else:
-            fname = self.filename + ".json"
+            fname = self.filename
         
-        with open( fname, "rt") as jfile:
+        with open( fname + ".json", "rt") as jfile:
             data = json.load(jfile)
         
-        data = self.fix_types(data)
-            
-        self.extend(data)   # slow, with validation
+        if isinstance(data, dict) and data.get('format') == COLUMNAR:
+            if data['names'] != self.column_names:
+                raise TableStoreError(f"Load: columns {data['names']} in file don't match {self.column_names}.")
+            columns = self.fix_column_types([ decode_column(c) for c in data['columns'] ])
+            rows = None
+        else:
+            rows = self.fix_types(data)
+            columns = None
+        
+        chk = self._read_chk(fname)
+        
+        if columns is None:
+            length = len(rows)
+        else:
+            length = len(columns[0]) if columns else 0
+        
+        self._generation = chk.get('gen', 0) if chk else 0
+        self._snapshot_sum = None   # from file, when needed
+        
+        if trusted and self.length == 0 and self._check_matches(fname, chk, length):
+            if columns is None:
+                columns = [ list(col) for col in zip(*rows) ]
+            self._load_columns(columns)
+        elif columns is not None and not (self.db and self.db._tx):
+            # columnar, validated a column at a time, no rows built
+            err_list = self.validate_columns(columns)
+            if len(err_list) > 0:
+                raise TableStoreError('Load - invalid rows, no update: ', err_list)
+            self._load_columns(columns)
+        else:
+            if rows is None:
+                rows = [ list(r) for r in zip(*columns) ]
+            if rows:
+                self.extend(rows)   # slow, with validation
+        
+        if replay:
+            self.replay_journal(fname)
+        self._reset_journal()   # loaded rows are not changes
+
+    @staticmethod
+    def _read_chk(fname:str ) -> dict:
+        """.chk file written by save(), None if missing or unreadable."""
+
+        try:
+            with open( fname + ".chk", "rt") as cfile:
+                return json.load(cfile)
+        except (OSError, ValueError):
+            return None
+
+    def _check_matches(self, fname:str, chk:dict, rows:int ) -> bool:
+        """.chk from save() matches schema, rows and the .json checksum.
+           The file is read a second time, a chunk at a time, rather than
+           holding the whole text beside the parsed rows."""
 
+        if not chk:
+            return False
+
+        return ( chk.get('schema') == self.schema_fingerprint() and
+                 chk.get('rows') == rows and
+                 chk.get('checksum') == self._snapshot_checksum(fname) )
         
-    def save(self, filename:str=None):
+    def save(self, filename:str=None, columnar:bool=False ):
         """Save TableStore or, trigger db.save_all and eventually this table
-           save, to a JSON file."""
+           save, to a JSON file.  A .chk file with the checksum of the JSON
+           text and the schema fingerprint allows a trusted load.
+           If columnar, one array per column, run-length or dictionary
+           encoded if repetitive, no transpose to rows either way. """
         
         # db will re-call table.save providing full 'db_dir/filename' path
         if self.db and not filename and filename != self.filename:
-            self.db.save_all() 
-    
-        data = self.dump()
+            self.db.save_all(columnar) 
         
         if filename:
-            fname = filename + ".json"
+            fname = filename
+        else:
+            fname = self.filename
+
+        if columnar:
+            data = { 'format': COLUMNAR, 'names': self.column_names,
+                     'columns': [ encode_column(c) for c in self.store ] }
         else:
-            fname = self.filename + ".json"
+            data = [ list(d) for d in self.dump() ]
+
+        with open( fname + ".json", "wt") as jfile:
+            json.dump(data, jfile)
+        del data
+
+        # over the written file a chunk at a time, no JSON text in memory
+        self._generation += 1
+        self._snapshot_sum = file_checksum(fname + ".json")
+
+        with open( fname + ".chk", "wt") as cfile:
+            json.dump({ 'checksum': self._snapshot_sum,
+                        'schema': self.schema_fingerprint(),
+                        'rows': self.length,
+                        'gen': self._generation }, cfile)
+
+        # the snapshot has all changes, journal starts over
+        try:
+            os.remove(fname + ".log")
+        except OSError:
+            pass
+        self._journal_live = False
+        self._reset_journal()
+
+    """ Journal Methods
+        An append-only .log per table of changes since the last save, from
+        a change cursor, the changed masks plus pops.  Save cost becomes
+        proportional to the changes.  Lines are JSON:
+            { "gen": n, "sum": c }           header, generation and checksum
+                                             of the snapshot the log follows
+            [ "p", slot ]                    pop
+            [ "r", slot, [ ci, v, ... ] ]    changed values, or a new row
+        load() replays a log only onto the snapshot it follows, same .chk
+        generation and same .json checksum.  A later save() ( a checkpoint )
+        writes .json, then .chk, then removes the log.  A crash after the
+        new .json leaves a log with the old checksum, after the new .chk
+        one with an old generation, either way the log is ignored, its
+        changes are in the new snapshot. """
+
+    def open_journal(self):
+        """Start journaling changes, from now on."""
+
+        if not self.cursors or JOURNAL not in self.cursors:
+            self.open_cursor(JOURNAL)
+
+    def _reset_journal(self):
+
+        if self.cursors and JOURNAL in self.cursors:
+            self.close_cursor(JOURNAL)
+            self.open_cursor(JOURNAL)
+
+    def _snapshot_checksum(self, filename:str ) -> int:
+        """Checksum of the snapshot, .json, loaded or saved.  After a load
+           read from the file, a chunk at a time, once."""
+
+        if self._snapshot_sum is None:
+            self._snapshot_sum = file_checksum(filename + ".json")
+
+        return self._snapshot_sum
+
+    def write_journal(self, filename:str=None ) -> int:
+        """Append changes since the last write to the .log file, returns
+           number of records written."""
+
+        if not self.cursors or JOURNAL not in self.cursors:
+            raise TableStoreError(f"Write Journal: journal not open for {self.tablename}, use open_journal().")
 
-        with open( fname, "wt") as jfile:
-            json.dump([ list(d) for d in data ], jfile)
+        filename = filename or self.filename
+        fname = filename + ".log"
+
+        records = []
+        for slot, col_name, value in self.changes(JOURNAL):
+            if col_name is None:
+                records.append([ 'p', slot ])
+            elif records and records[-1][0] == 'r' and records[-1][1] == slot:
+                records[-1][2].extend([ self.slot_for_col(col_name), value ])
+            else:
+                records.append([ 'r', slot, [ self.slot_for_col(col_name), value ] ])
+
+        if not records and self._journal_live:
+            return 0
+
+        with open( fname, "at" if self._journal_live else "wt") as lfile:
+            if not self._journal_live:
+                lfile.write(json.dumps({ 'gen': self._generation,
+                                         'sum': self._snapshot_checksum(filename) }) + '\n')
+                self._journal_live = True
+            for rec in records:
+                lfile.write(json.dumps(rec) + '\n')
+
+        return len(records)
+
+    def replay_journal(self, filename:str=None ) -> int:
+        """Apply the .log file, if its generation matches the snapshot,
+           returns records applied.  Values were validated when journaled,
+           rows are applied directly, db relation key counts kept.  A torn
+           last line, from a crash during a write, ends the replay."""
+
+        filename = filename or self.filename
+        fname = filename + ".log"
+
+        try:
+            lfile = open( fname, "rt")
+        except OSError:
+            return 0
+
+        tuple_cols = { i for i, pt in enumerate(self.ptypes)
+                       if pt is tuple or tuple in pt.__bases__ }
+        applied = 0
+
+        with lfile:
+            try:
+                header = json.loads(lfile.readline())
+            except ValueError:
+                header = None
+
+            if not isinstance(header, dict) or header.get('gen') != self._generation:
+                return 0   # stale, older than the snapshot
+
+            if header.get('sum') != self._snapshot_checksum(filename):
+                return 0   # new snapshot written, crash before new .chk
+
+            for line in lfile:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    break
+
+                if rec[0] == 'p':
+                    if rec[1] < self.length:   # else a row never journaled
+                        self._track_keys([ TupleStore.pop(self, rec[1]) ], -1)
+                else:
+                    slot, pairs = rec[1], rec[2]
+                    values = {}
+                    for i in range(0, len(pairs), 2):
+                        ci, v = pairs[i], pairs[i + 1]
+                        values[ci] = tuple(v) if ci in tuple_cols and isinstance(v, list) else v
+                    if slot >= self.length:
+                        row = [ values[ci] for ci in range(len(self.column_names)) ]
+                        TupleStore.append(self, row)
+                        self._track_keys([ row ], 1)
+                    else:
+                        old_row = list(self.get_row(slot))
+                        for ci, v in values.items():
+                            TupleStore.set(self, slot, self.column_names[ci], v)
+                        self._track_keys([ old_row ], -1)
+                        self._track_keys([ list(self.get_row(slot)) ], 1)
+                applied += 1
+
+        self._journal_live = True
+
+        return applied
             
 
 
@@ -620,9 +1378,166 @@ CRel_fields = [ 'ccol', 'parent', 'pcol' ]
 CRelation = namedtuple('CRelation', CRel_fields )
 
 
+class RelationKeys(object):
+    """Key counts for one RelationDef, kept by DataStore and updated by both
+       tables on every append, extend, set, upsert, pop and clear, so
+       referential checks are dict lookups, no scan of either table.
+       Counts, not sets, since a parent column may not be unique."""
+
+    def __init__(self):
+
+        self.parents:dict = {}   # parent pcol value -> number of parent rows
+        self.children:dict = {}  # child ccol value -> number of child rows
+
+    @staticmethod
+    def count(counts:dict, value, delta:int ):
+
+        n = counts.get(value, 0) + delta
+        if n > 0:
+            counts[value] = n
+        else:
+            counts.pop(value, None)
+
+
 class DataStoreError(Exception):
     pass
 
+
+class _InTransaction(object):
+    """Context for a cascade inside a transaction, commit checks later."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class Transaction(object):
+    """Deferred constraints over DataStore tables, from db.transaction().
+
+        with db.transaction():
+            db.Project.append(['newproj', ...])
+            db.ProjectMember.extend(members)   # parent may come later
+
+       Updates apply as made, with type checks.  Key uniqueness and parent
+       and child references are checked once at commit, in bulk, with sets
+       and the db relation key counts.  On a failed check, or an exception
+       in the block, every table is rolled back to its state at first
+       update in the transaction.  State is saved copy on write, as for
+       snapshot(), columns are copied only if set or pop change them. """
+
+    def __init__(self, db:'DataStore' ):
+
+        self.db = db
+        self._saved:dict = {}   # tname -> saved state, see touch
+
+    def __enter__(self):
+
+        if self.db._tx:
+            raise DataStoreError('Transaction: already in a transaction.')
+
+        self.db._tx = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.db._tx = None
+
+        if exc_type is not None:
+            self.rollback()
+            return False   # re-raise
+
+        errors = self.check()
+        if errors:
+            self.rollback()
+            raise DataStoreError('Transaction - constraint errors, rolled back: ', errors)
+
+        self.commit()
+        return False
+
+    def commit(self):
+        """Keep the updates.  Columns copied in the transaction belong to
+           the table, the rest go back to their flags before it, so the next
+           set() doesn't copy a column again.  A snapshot() taken inside the
+           transaction made its own flags, those are kept."""
+
+        for table, store, _, _, _, shared, tx_shared in self._saved.values():
+            if table._shared is not tx_shared:
+                continue
+            flags = [ store[i] is table.store[i] and bool(shared and shared[i])
+                      for i in range(len(store)) ]
+            table._shared = flags if any(flags) else None
+
+        self._saved = {}
+
+    def touch(self, table:TableStore ):
+        """Save table state on first update, column lists are shared until
+           an in place change copies them.  Appends only extend them, so
+           a column prefix of saved length is the saved column."""
+
+        if table.tablename in self._saved:
+            return
+
+        shared = table._shared   # a snapshot's flags, if any
+        table._shared = [True] * len(table.column_names)
+
+        cursors = None
+        if table.cursors is not None:
+            cursors = { n: [ list(m), list(p) ] for n, (m, p) in table.cursors.items() }
+
+        self._saved[table.tablename] = ( table, list(table.store), table.length,
+                                         list(table.changed), cursors,
+                                         shared, table._shared )
+
+    @property
+    def tables(self) -> list[str]:
+        """Names of tables updated in transaction."""
+
+        return list(self._saved.keys())
+
+    def check(self) -> list:
+        """Key uniqueness for tables updated and references for relations
+           with a table updated, returns list of errors."""
+
+        errors = []
+
+        for table, *_ in self._saved.values():
+            key_columns = [ table.store[table.slot_for_col(k)] for k in table.unique_columns ]
+            seen = set()
+            for key in zip(*key_columns):
+                if key in seen:
+                    errors.append(f"Validation Add Error: key '{list(key)}' is duplicate in {table.tablename}.")
+                seen.add(key)
+
+        for rel, refs in self.db.relation_keys.items():
+            if rel.parent in self._saved or rel.child in self._saved:
+                errors.extend([ f"Invalid Parent Key: key '{k}' in {rel.child} has no parent key in {rel.parent} table"
+                                for k in refs.children if k not in refs.parents ])
+
+        return errors
+
+    def rollback(self):
+        """Restore tables updated, and their relation key counts."""
+
+        for table, store, length, changed, cursors, _, _ in self._saved.values():
+            if table.db:
+                table._track_columns(table.store, -1)
+            for i in range(len(store)):
+                table.store[i] = store[i][:length]
+            table._version += 1   # chunked scans across the transaction raise
+            table._shared = None
+            table.changed = changed
+            table.cursors = cursors
+            if table.indexer and table.indexer.index:
+                table.indexer.reindex()
+            if table.orderer:
+                table.orderer.reorder()
+            if table.db:
+                table._track_columns(table.store, 1)
+
+        self._saved = {}
+
 class DataStore(object):
     """Multi-table collection, has some features of a relational database.  
        In fact, it's more a relational database than a "data store" per se,
@@ -643,6 +1558,11 @@ class DataStore(object):
 
     def __init__(self, dbdef:DataStoreDef=None ):
     
+        # lazy load_all, unloaded tname -> trusted, see __getattr__
+        self._pending:dict = {}
+        self._loaded:set = set()  # tnames loaded by load_all, until clear_all
+        self._tx:Transaction = None   # see transaction()
+    
         if self._dbdef is not None:
             # rewrite table_defs from class instances to DBTableDef tuples
             
@@ -656,6 +1576,9 @@ class DataStore(object):
         if len({ tdef.tname for tdef in self.dbdef.table_defs }) != len([ tdef.tname for tdef in self.dbdef.table_defs ]):
             raise DataStoreError('DataStoreDef contains duplicate tables.')
         
+        # parent key and child reference counts per relation, see RelationKeys
+        self.relation_keys = { rel: RelationKeys() for rel in self.dbdef.relations }
+        
         self.tabledict = OrderedDict()  # for mpy to maintain order, must load par->child
         for tdef in self.dbdef.table_defs:
             self.tabledict[tdef.tname] = tdef.ttype(tdef, self)
@@ -674,10 +1597,21 @@ class DataStore(object):
         if not path_exists(self.dbdef.dirname):
             os.mkdir(self.dbdef.dirname)
 
+    def __getattr__(self, name:str ):
+        """Only called when normal lookup fails, db.<tname> for a table
+           not loaded yet by a lazy load_all."""
+
+        if name not in ('_pending', '_tx', '_loaded') and name in self._pending:
+            self._materialize(name)
+            return self.tabledict[name]
+
+        raise AttributeError(f"'DataStore' object has no attribute '{name}'")
+
     def __del__(self):
         """ Remove tangle of references, in mpy del is called by gc.collect"""
         
         self.dbdef = None   # external table class refs.
+        self.relation_keys = None
         self.tabledict = None  # table instances, may be external refs. 
                                # from x = db.table('str') which is bad for gc
        
@@ -699,6 +1633,10 @@ class DataStore(object):
         return self.dbdef.table_defs
         
     def table(self, name:str) -> TableStore:
+    
+        if name in self._pending:
+            self._materialize(name)
+            
         return self.tabledict[name]
         
     def tables(self) -> list[tuple[str, TableStore]]:
@@ -714,22 +1652,191 @@ class DataStore(object):
             tobj.reset_changed()
         
     def clear_all(self):
-        """Empty tables, reset index and changed mask"""
+        """Empty tables, reset index and changed mask.  Tables waiting on
+           a lazy load stay empty, not loaded."""
+    
+        for tname in list(self._pending):
+            del self._pending[tname]
+            setattr(self, tname, self.tabledict[tname])
+        self._loaded = set()
     
         for tname, tobj in self.tables():
             tobj.clear()
-        
-    def load_all(self):
+
+    def query(self, tname:str ) -> 'Query':
+        """Query starting from table tname, see dbquery.
+           For ex. db.query('Member').not_exists('ProjectMember').values('name')"""
+
+        try:
+            from dbquery import Query
+        except ImportError:
+            from lib.dbquery import Query
+
+        return Query(self, tname)
+
+    def transaction(self) -> Transaction:
+        """Context manager, updates to any tables checked for keys and
+           references at the end, all applied or all rolled back."""
+
+        return Transaction(self)
+
+    def rebuild_keys(self):
+        """Recount relation keys from table columns, after updates made
+           below TableStore methods, TupleStore.set for ex."""
+
+        for rel, refs in self.relation_keys.items():
+            refs.parents = {}
+            refs.children = {}
+            for v in self.tabledict[rel.parent].get_column(rel.pcol):
+                refs.count(refs.parents, v, 1)
+            for v in self.tabledict[rel.child].get_column(rel.ccol):
+                refs.count(refs.children, v, 1)
+
+    def memory_report(self) -> dict:
+        """Estimated bytes, { 'tables': { tname: table.memory_report() },
+           'total': bytes for all tables }.  See ListStore.memory_report."""
+
+        tables = { tname: tobj.memory_report() for tname, tobj in self.tables() }
+
+        return { 'tables': tables,
+                 'total': sum([ r['total'] for r in tables.values() ]) }
+        
+    def load_all(self, trusted:bool=False, lazy:bool=False ):
+        """Load all tables, parents first.  If trusted, tables saved by
+           save_all and unchanged since load without validation.
+           If lazy, tables load on first access, db.table(tname) or
+           db.<tname>, see preload. """
+        
+        # tables already loaded stay as they are, not loaded twice
+        tnames = [ tn for tn in self.tabledict if tn not in self._loaded ]
+        
+        if lazy:
+            for tname in tnames:
+                if tname not in self._pending:
+                    self._pending[tname] = trusted
+                    delattr(self, tname)   # __getattr__ takes over
+            return
     
-        for tname, tobj in self.tables():
-            fullname = path_separator().join([self.dirname, tname])
-            tobj.load(fullname)
+        for tname in tnames:
+            if tname in self._pending:
+                del self._pending[tname]
+                setattr(self, tname, self.tabledict[tname])
+    
+        self._load_tables(tnames, trusted)
+
+    def relation_levels(self) -> list[list[str]]:
+        """Table names by level of the parent -> child graph, level 0 has
+           no parents, a child is one level below its deepest parent."""
+
+        level = {}
+
+        def depth(tname, seen):
+            if tname not in level:
+                if tname in seen:
+                    raise DataStoreError(f"Relations: cycle through table '{tname}'.")
+                parents = [ r.parent for r in self.relations if r.child == tname ]
+                level[tname] = max([ depth(p, seen | { tname }) + 1 for p in parents ] or [0])
+            return level[tname]
+
+        for tname in self.tabledict:
+            depth(tname, set())
+
+        levels = [ [] for _ in range(max(level.values()) + 1 if level else 0) ]
+        for tname in self.tabledict:
+            levels[level[tname]].append(tname)
+
+        return levels
+
+    def _load_tables(self, tnames:list, trusted:bool ):
+        """Load tables, by relation level, parents first, then replay
+           journals.  Snapshots are validated against each other, journals
+           last."""
+
+        tnames = [ tn for level in self.relation_levels()
+                      for tn in level if tn in tnames ]
+        self._loaded.update(tnames)
+        fullnames = { tn: path_separator().join([self.dirname, tn]) for tn in tnames }
+
+        for tname in tnames:
+            self.tabledict[tname].load(fullnames[tname], trusted, replay=False)
+
+        for tname in tnames:
+            tobj = self.tabledict[tname]
+            if tobj.replay_journal(fullnames[tname]):
+                tobj._reset_journal()
+
+    def _materialize(self, tname:str ):
+        """Load a pending table, with what its integrity checks need: its
+           child tables, for children_exist, and all ancestors of both,
+           for parent keys and validated loads.  Deeper descendants load
+           when a cascade reaches them, see TableStore._load_children.
+           Loads are not part of a transaction in progress."""
+
+        need = { tname } | { r.child for r in self.relations if r.parent == tname }
+        stack = list(need)
+        while stack:
+            n = stack.pop()
+            for r in self.relations:
+                if r.child == n and r.parent not in need:
+                    need.add(r.parent)
+                    stack.append(r.parent)
+
+        load = [ tn for tn in need if tn in self._pending ]
+        trusted = all([ self._pending[tn] for tn in load ])
+
+        for tn in load:
+            del self._pending[tn]
+            setattr(self, tn, self.tabledict[tn])
+
+        tx, self._tx = self._tx, None
+        try:
+            self._load_tables(load, trusted)
+        finally:
+            self._tx = tx
+
+    def preload(self, tnames:list ):
+        """Load hot tables now, after a lazy load_all."""
+
+        for tname in tnames:
+            if tname in self._pending:
+                self._materialize(tname)
+
+    def loaded(self) -> list[str]:
+        """Names of tables loaded, not waiting on first access."""
+
+        return [ tn for tn in self.tabledict if tn not in self._pending ]
         
-    def save_all(self):
+    def save_all(self, columnar:bool=False ):
+        """Save all tables, as rows or, if columnar, as column arrays.
+           Tables not loaded yet are unchanged on disk, not saved. """
     
         for tname, tobj in self.tables():
-            fullname = path_separator().join([self.dirname, tname]) 
-            tobj.save(fullname)
+            if tname not in self._pending:
+                tobj.save(path_separator().join([self.dirname, tname]), columnar)
+
+    def open_journal(self):
+        """Journal changes in all tables, see TableStore journal methods."""
+
+        for tname, tobj in self.tables():
+            tobj.open_journal()
+
+    def save_changes(self) -> dict:
+        """Append changes since last save_changes to each table's .log,
+           returns { tname: records written }."""
+
+        written = {}
+        for tname, tobj in self.tables():
+            if tname in self._pending:
+                continue
+            fullname = path_separator().join([self.dirname, tname])
+            written[tname] = tobj.write_journal(fullname)
+
+        return written
+
+    def checkpoint(self, columnar:bool=False ):
+        """Full save of all tables, the journals start over."""
+
+        self.save_all(columnar)
 
 def display_table( tstore ):
     # print('Store type  ', type(tstore))
@@ -75,9 +75,14 @@ from collections import namedtuple
 # from lib.vdict import VolatileDict as vdict
 
 try:
-    from lib.core.bitops import power2, bit_indexes, bitslice_insert, bit_remove
+    from lib.core.bitops import power2, bit_indexes, bit_count, bitslice_insert, bit_remove, logar2
 except ImportError:
-    from core.bitops import power2, bit_indexes, bitslice_insert, bit_remove
+    from core.bitops import power2, bit_indexes, bit_count, bitslice_insert, bit_remove, logar2
+
+try:
+    from lib.core.memsize import sizeof, values_size
+except ImportError:
+    from core.memsize import sizeof, values_size
 
 from time import localtime
 
@@ -89,9 +94,21 @@ def timestamp():
 
      return localtime()[:6]
 
+# result of upsert_many(), row counts
+UpsertCount = namedtuple('UpsertCount', ['inserted', 'updated', 'unchanged'])
+
 
 nl = print
 
+# rows per step for chunked column scans, small enough to keep
+# a Pico IO loop responsive, large enough to amortize the call overhead.
+SCAN_CHUNK = 256
+
+# Evaluator operators safe for where() scans, two values in, a bool out,
+# no side effects on the arguments.
+WHERE_OPS = ('eq', 'ne', 'gt', 'gte', 'lt', 'lte', 'btw', 'btwe',
+             'in', 'notin', 'is', 'isnot')
+
 """ mpy
 >>> dir(list)
 ['__class__', '__name__', 'append', 'clear', 'copy', 'count', 'extend', 'index',
@@ -141,6 +158,20 @@ class ListStore(object):
         # no overhead if not used
         self.indexer = None
 
+        # needs to be set via set_orderer() using Orderer class, ditto
+        self.orderer = None
+
+        # per column flag, column list still shared with a snapshot,
+        # None if no snapshot taken
+        self._shared = None
+
+        # change data capture, cursor name -> [ changed masks, popped slots ],
+        # set via open_cursor(), no overhead if not used
+        self.cursors = None
+
+        # bumped by every change, chunked scans check it between chunks
+        self._version = 0
+
 
     def __iter__(self) -> list[list]:
         """Yield columns as list of lists, an iterator over rows."""
@@ -218,7 +249,7 @@ class ListStore(object):
         if slot < 0:
             raise ListStoreError(f"Slot number {slot} must greater than 0.")
 
-        if slot > len(self.store[0]):
+        if slot > self.length:
             raise ListStoreError(
                 f"Slot number {slot} is greater than len of ListStore."
             )
@@ -297,13 +328,25 @@ class ListStore(object):
 
         old_value = self.store[col_slot][slot]
 
+        if self.orderer:   # before the store is changed
+            self.orderer.check_value(col_name, value)
+
+        self._own_column(col_slot)
         self.store[col_slot][slot] = value
+        self._version += 1
 
         if self.indexer:
             self.indexer.update_index(col_name, slot, old_value, value)
 
+        if self.orderer:
+            self.orderer.update_order(col_name, slot, old_value, value)
+
         self.changed[col_slot] |= power2(slot)
 
+        if self.cursors:
+            for masks, _ in self.cursors.values():
+                masks[col_slot] |= power2(slot)
+
     def append(self, in_list: list = None):
         """Append to list and update index with append_index.
         No need to index_attr entire column, all bitmasks
@@ -325,15 +368,25 @@ class ListStore(object):
 
         ilist = list(in_list)
 
+        if self.orderer:   # before the store is changed
+            self.orderer.check_rows([ilist])
+
         for i, v in enumerate(ilist):
             self.store[i].append(v)
+        self._version += 1
 
         for i in range(len(ilist)):
             self.changed[i] |= power2(len(self.store[0]) - 1)
 
+        if self.cursors:
+            self._cursors_mark(power2(len(self.store[0]) - 1))
+
         if self.indexer and self.indexer.index:
             self.indexer.append_index(ilist)
 
+        if self.orderer:
+            self.orderer.append_order(ilist)
+
     def extend(self, list_of_lists: list = None):
         """Works esentially the same as list extend.  An error
            in any of the new rows prevents update of all rows
@@ -368,6 +421,9 @@ class ListStore(object):
 
         # new_list is the input list with defaults
 
+        if self.orderer:   # before the store is changed
+            self.orderer.check_rows(new_list)
+
         save_top = self.length  # top_bit, that is last bit + 1
 
         # transpose list of rows to list of columns
@@ -375,6 +431,7 @@ class ListStore(object):
 
         for i, column in enumerate(self.store):
             self.store[i].extend(col_list[i])
+        self._version += 1
 
         for i in range(len(self.store)):
             # insert to the right of last bit index + 1
@@ -385,9 +442,15 @@ class ListStore(object):
                 (1 << (len(new_list))) - 1,
             )
 
+        if self.cursors:
+            self._cursors_mark(((1 << len(new_list)) - 1) << save_top)
+
         if self.indexer and self.indexer.index:
             self.indexer.extend_index(new_list)
 
+        if self.orderer:
+            self.orderer.extend_order(new_list)
+
     def pop(self, row: int) -> list:
         """Remove slots in liststore for a given row, and update all int
         bitmasks by AND NOT to all values in attr subdicts. Guarantees
@@ -398,15 +461,28 @@ class ListStore(object):
 
         self.check_slot(row)
 
+        for i in range(len(self.column_names)):
+            self._own_column(i)
+
         popped_row = [self.store[i].pop(row) for i in range(len(self.column_names)) ]
+        self._version += 1
 
         for i in range(len(self.column_names)):
             self.changed[i] = bit_remove(self.changed[i], row)
 
+        if self.cursors:
+            for masks, pops in self.cursors.values():
+                for i in range(len(masks)):
+                    masks[i] = bit_remove(masks[i], row)
+                pops.append(row)
+
         # self.indexer.reindex()
         if self.indexer:
             self.indexer.pop_index(row)  # may be faster ?
 
+        if self.orderer:
+            self.orderer.pop_order(row, popped_row)
+
         return popped_row
 
     def clear(self):
@@ -415,14 +491,26 @@ class ListStore(object):
         if len(self.column_names) == 0:
             return
 
+        if self.cursors:   # as pops from the top down
+            for name in self.cursors:
+                masks, pops = self.cursors[name]
+                pops.extend(range(self.length - 1, -1, -1))
+                self.cursors[name] = [[0] * len(masks), pops]
+
         for i in range(len(self.column_names)):
             self.store[i] = []
+        self._version += 1
+
+        self._shared = None
 
         self.reset_changed()
 
         if self.indexer:
             self.indexer.clear()
 
+        if self.orderer:
+            self.orderer.clear()
+
         return
 
     def dump(self) -> list[list]:
@@ -457,6 +545,547 @@ class ListStore(object):
 
         return il
 
+    """ Bulk Update Methods """
+
+    def _key_map(self, key_slots: list) -> dict:
+        """Dict of key tuple -> first slot with that key, one column pass."""
+
+        kmap = {}
+        columns = [ self.get_column(self.column_names[ks]) for ks in key_slots ]
+
+        for slot, key in enumerate(zip(*columns)):
+            if key not in kmap:
+                kmap[key] = slot
+
+        return kmap
+
+    def _upsert_split(self, rows: list, key_columns: list) -> tuple:
+        """Resolve defaults and split rows into updates, [(slot, row)] for
+           keys in the store, and inserts, [row] for new keys.  A key more
+           than once in rows, the last row wins.  A single indexed key column
+           is resolved through the Indexer masks, otherwise a key -> slot
+           dict is built once."""
+
+        if not key_columns:
+            raise ListStoreError("Upsert: key_columns must name at least one column.")
+
+        key_slots = [ self.slot_for_col(k) for k in key_columns ]
+
+        indexed = (len(key_slots) == 1 and self.indexer is not None
+                   and key_columns[0] in self.indexer.index)
+        kmap = None
+
+        updates = []
+        inserts = []
+        update_at = {}   # slot -> position in updates
+        insert_at = {}   # key -> position in inserts
+
+        for row in rows:
+            rrow = list(self.resolve_defaults(row))
+            key = tuple([ rrow[ks] for ks in key_slots ])
+
+            try:
+                if key in insert_at:
+                    inserts[insert_at[key]] = rrow
+                    continue
+
+                if indexed and type(key[0]) in self.indexer._indexable:
+                    m = self.index_mask(key_columns[0], key[0])
+                    slot = logar2(m & -m) if m else -1   # lowest bit, first row
+                else:
+                    if kmap is None:
+                        kmap = self._key_map(key_slots)
+                    slot = kmap.get(key, -1)
+            except TypeError:
+                raise ListStoreError(f"Upsert: key {key} is not hashable.")
+
+            if slot < 0:
+                insert_at[key] = len(inserts)
+                inserts.append(rrow)
+            elif slot in update_at:
+                updates[update_at[slot]] = (slot, rrow)
+            else:
+                update_at[slot] = len(updates)
+                updates.append((slot, rrow))
+
+        if self.orderer:   # unsortable values fail here, nothing written yet
+            self.orderer.check_rows([ r for _, r in updates ] + inserts)
+
+        return updates, inserts
+
+    def _upsert_set(self, updates: list) -> tuple:
+        """Write changed values of update rows through set(), for stores
+           keeping rows other than in self.store by slot."""
+
+        updated = 0
+
+        for slot, rrow in updates:
+            row_changed = False
+            for ci, value in enumerate(rrow):
+                col_name = self.column_names[ci]
+                if self.get(slot, col_name) != value:
+                    self.set(slot, col_name, value)
+                    row_changed = True
+            if row_changed:
+                updated += 1
+
+        return updated, len(updates) - updated
+
+    def _upsert_apply(self, updates: list) -> tuple:
+        """Write changed values of update rows, changed and cursor masks
+           ORed once per column.  Return (rows updated, rows unchanged).
+           Subclasses not storing rows in self.store by slot override this,
+           with _upsert_set."""
+
+        col_masks = [0] * len(self.column_names)
+        updated = 0
+
+        for slot, rrow in updates:
+            row_changed = False
+            for ci, value in enumerate(rrow):
+                old_value = self.store[ci][slot]
+                if old_value == value:
+                    continue
+                self._own_column(ci)
+                self.store[ci][slot] = value
+                self._version += 1
+                if self.indexer:
+                    self.indexer.update_index(self.column_names[ci], slot, old_value, value)
+                if self.orderer:
+                    self.orderer.update_order(self.column_names[ci], slot, old_value, value)
+                col_masks[ci] |= power2(slot)
+                row_changed = True
+            if row_changed:
+                updated += 1
+
+        for ci, m in enumerate(col_masks):
+            if m:
+                self.changed[ci] |= m
+                if self.cursors:
+                    for masks, _ in self.cursors.values():
+                        masks[ci] |= m
+
+        return updated, len(updates) - updated
+
+    def upsert_many(self, rows: list, key_columns: list) -> 'UpsertCount':
+        """Update rows whose key_columns values are in the store, append
+           the others, in one pass.  For ex. a periodic device snapshot,
+           ls.upsert_many(readings, ['device']).
+           Returns UpsertCount(inserted, updated, unchanged)."""
+
+        updates, inserts = self._upsert_split(rows, key_columns)
+
+        # updates first, slots are good until an insert evicts or moves rows
+        updated, unchanged = self._upsert_apply(updates)
+
+        if len(inserts) > 0:
+            self.extend(inserts)
+
+        return UpsertCount(len(inserts), updated, unchanged)
+
+    """ Change Data Capture Methods
+
+        Each named cursor keeps its own changed masks and list of popped
+        slots, so several consumers, say a persistence writer, a display
+        and a sync task, can track changes independently of each other
+        and of the store's own changed masks. """
+
+    def open_cursor(self, name: str, from_start: bool = False):
+        """Open a named change cursor.  If from_start, all current rows
+           count as changed, otherwise only changes from now on."""
+
+        if self.cursors is None:
+            self.cursors = {}
+
+        if name in self.cursors:
+            raise ListStoreError(f"Open Cursor: cursor '{name}' already open.")
+
+        fill = (1 << self.length) - 1 if from_start else 0
+
+        self.cursors[name] = [[fill] * len(self.column_names), []]
+
+    def close_cursor(self, name: str):
+
+        if self.cursors and name in self.cursors:
+            del self.cursors[name]
+
+    def _cursors_mark(self, bits: int):
+        """OR bits into every column mask of every cursor, new rows."""
+
+        for masks, _ in self.cursors.values():
+            for i in range(len(masks)):
+                masks[i] |= bits
+
+    def changes(self, name: str):
+        """Yield (slot, col_name, new_value) deltas since the cursor's last
+           read, then the cursor starts over.  Pops since last read come
+           first, as (slot, None, None) in the order popped, with slots as
+           they were at pop time.  A consumer applies the pops, skipping a
+           slot past its own length ( a row it never saw ), then the values."""
+
+        if not self.cursors or name not in self.cursors:
+            raise ListStoreError(f"Changes: cursor '{name}' not open.")
+
+        masks, pops = self.cursors[name]
+        self.cursors[name] = [[0] * len(self.column_names), []]
+
+        for slot in pops:
+            yield (slot, None, None)
+
+        rows = 0
+        for m in masks:
+            rows |= m
+
+        for slot in bit_indexes(rows):
+            bit = 1 << slot
+            for i, col_name in enumerate(self.column_names):
+                if masks[i] & bit:
+                    yield (slot, col_name, self.store[i][slot])
+
+    """ Snapshot Methods """
+
+    def snapshot(self) -> 'ListSnapshot':
+        """Read-only, point-in-time view of the store.  Column lists are
+           shared, not copied.  Appends don't disturb a snapshot, which only
+           sees its own length, and set()/pop() copy a shared column once
+           before changing it in place.  So a reader thread gets consistent
+           scans with no lock and no full copy.  The copy is per column, the
+           whole column list, not a segment of it, a column is a plain list
+           here, for segment sized copies see SegmentStore."""
+
+        self._shared = [True] * len(self.column_names)
+
+        return self._snapshot_cls(self)
+
+    def _own_column(self, col_slot: int):
+        """Copy the whole column before an in-place change if a snapshot
+           shares it, once per column per snapshot."""
+
+        if self._shared and self._shared[col_slot]:
+            self.store[col_slot] = list(self.store[col_slot])
+            self._shared[col_slot] = False
+
+    """ Query Methods """
+
+    @staticmethod
+    def _scan_chunk(column, func, args, start:int, end:int, miss:bool=False) -> int:
+        """Tight scan of column[start:end], return int mask of matches shifted
+           to slot position.  Values that can't be compared, say None < 3,
+           match as miss rather than raise, don't match for most operators,
+           match for notin, an unhashable value is not in the set.  The hook
+           for typed-array backends."""
+
+        mask = 0
+        bit = 1
+
+        try:
+            for value in column[start:end]:
+                if func(value, *args):
+                    mask |= bit
+                bit <<= 1
+        except (TypeError, ValueError, AttributeError):
+            mask = 0
+            bit = 1
+            for value in column[start:end]:
+                try:
+                    if func(value, *args):
+                        mask |= bit
+                except (TypeError, ValueError, AttributeError):
+                    if miss:
+                        mask |= bit
+                bit <<= 1
+
+        return mask << start
+
+    @staticmethod
+    def _where_func(op:str, args:tuple) -> tuple:
+        """Resolve operator name to Evaluator function, return (func, args,
+           miss), miss the _scan_chunk result for a value that raises."""
+
+        try:
+            from lib.evaluator import Evaluator
+        except ImportError:
+            from evaluator import Evaluator
+
+        if op not in WHERE_OPS:
+            raise ListStoreError(f"Where: operator '{op}' not one of {WHERE_OPS}.")
+
+        func = Evaluator._evaluations[op]
+
+        if op in ('in', 'notin') and not isinstance(args[0], (set, frozenset)):
+            try:
+                args = (frozenset(args[0]),)  # hashed lookup, not list scan
+            except TypeError:
+                pass
+
+        return func, args, op == 'notin'
+
+    def iwhere(self, col_name:str, op:str, *args, chunk_size:int=SCAN_CHUNK ):
+        """Chunked form of where(), yields the running row mask after each
+           chunk of rows, the last mask yielded is the result.  Allows a long
+           scan to be interleaved with other work, for ex. an IOEngine cycle.
+           The store must not change until the scan is done, a change between
+           chunks raises ListStoreError rather than return stale slots."""
+
+        func, args, miss = self._where_func(op, args)
+
+        column = self.get_column(col_name)
+        length = self.length
+        version = self._version
+
+        mask = 0
+        start = 0
+
+        while start < length:
+            self._check_version(version, 'Where')
+            end = min(start + chunk_size, length)
+            mask |= self._scan_chunk(column, func, args, start, end, miss)
+            start = end
+            yield mask
+
+        if length == 0:
+            yield 0
+
+    def where(self, col_name:str, op:str, *args ) -> int:
+        """Return int row mask for rows where value in col_name passes
+           an Evaluator operator in WHERE_OPS, for ex. where('num', 'btw', 3, 10) or
+           where('name', 'in', ['Bob', 'Sue']).  The mask composes with
+           Indexer masks, ls.where('num', 'gt', 3) & ls.index['name']['Bob']. """
+
+        mask = 0
+        for mask in self.iwhere(col_name, op, *args):
+            pass
+
+        return mask
+
+    """ Chunked Scans, generators for cooperative use, see core.steps.run_steps
+        Slots found in earlier chunks are only good while the store is
+        unchanged, so ifind_all, iwhere and ireindex check the store version
+        between chunks and raise ListStoreError if any set, append, pop or
+        clear happened, restart the scan.  Changes after the last chunk are
+        the caller's, as for find_all or where. """
+
+    def _check_version(self, version: int, name: str):
+        """Raise if the store changed since version was taken."""
+
+        if self._version != version:
+            raise ListStoreError(f"{name}: store changed during chunked scan, slots would be stale.")
+
+    def ifind_all(self, col_name: str, value, chunk_size: int = SCAN_CHUNK):
+        """Chunked form of find_all(), yields the running list of slots
+           after each chunk of rows, the last list yielded is the result."""
+
+        column = self.get_column(col_name)
+        length = self.length
+        version = self._version
+        slots = []
+        start = 0
+
+        while start < length:
+            self._check_version(version, 'Find All')
+            end = min(start + chunk_size, length)
+            i = start
+            for v in column[start:end]:
+                if v == value:
+                    slots.append(i)
+                i += 1
+            start = end
+            yield slots
+
+        if length == 0:
+            yield slots
+
+    def idump(self, chunk_size: int = SCAN_CHUNK):
+        """Chunked form of dump(), yields a list of up to chunk_size rows
+           at a time, rows as from get_row(), so memory is bounded by the
+           chunk, not the store."""
+
+        start = 0
+
+        while start < self.length:
+            end = min(start + chunk_size, self.length)
+            yield [ self.get_row(slot) for slot in range(start, end) ]
+            start = end
+
+    def ireindex(self, chunk_size: int = SCAN_CHUNK):
+        """Chunked form of reindex(), yields rows done in current column.
+           A column's new index replaces the old one when it is done, so a
+           change raising part way leaves the maintained old index."""
+
+        if self.indexer:
+            version = self._version
+            for done in self.indexer.ireindex(chunk_size):
+                yield done
+                self._check_version(version, 'Reindex')
+
+    """ Aggregate Methods, no row construction """
+
+    def count(self, mask:int=None) -> int:
+        """Number of rows in mask ( popcount ), or all rows if no mask."""
+
+        if mask is None:
+            return self.length
+
+        return bit_count(mask)
+
+    def masked_values(self, col_name:str, mask:int=None) -> list:
+        """Column values for slots in mask, the column itself if no mask."""
+
+        column = self.get_column(col_name)
+
+        if mask is None:
+            return column
+
+        return [ column[i] for i in bit_indexes(mask) ]
+
+    def sum(self, col_name:str, mask:int=None):
+
+        return sum(self.masked_values(col_name, mask))
+
+    def min(self, col_name:str, mask:int=None):
+        """Minimum value in column, None if no rows."""
+
+        values = self.masked_values(col_name, mask)
+
+        return min(values) if len(values) > 0 else None
+
+    def max(self, col_name:str, mask:int=None):
+        """Maximum value in column, None if no rows."""
+
+        values = self.masked_values(col_name, mask)
+
+        return max(values) if len(values) > 0 else None
+
+    def mean(self, col_name:str, mask:int=None):
+        """Arithmetic mean of column, None if no rows."""
+
+        values = self.masked_values(col_name, mask)
+
+        return sum(values) / len(values) if len(values) > 0 else None
+
+    def min_slot(self, col_name:str, mask:int=None) -> int:
+        """Slot of the minimum value in column, -1 if no rows.
+           For ex. get_column('name')[min_slot('date_joined')]"""
+
+        column = self.get_column(col_name)
+        slots = range(self.length) if mask is None else bit_indexes(mask)
+
+        return min(slots, key=lambda i: column[i], default=-1)
+
+    def max_slot(self, col_name:str, mask:int=None) -> int:
+        """Slot of the maximum value in column, -1 if no rows."""
+
+        column = self.get_column(col_name)
+        slots = range(self.length) if mask is None else bit_indexes(mask)
+
+        return max(slots, key=lambda i: column[i], default=-1)
+
+    def _index_groups(self, col_name:str) -> dict:
+        """Copy of value -> mask dict for an indexed column, else None."""
+
+        if self.indexer and col_name in self.indexer.index:
+            return dict(self.indexer.index[col_name])
+
+        return None
+
+    def index_mask(self, col_name: str, value) -> int:
+        """Row mask for one indexed value, 0 if none."""
+
+        return self.indexer.index[col_name].get(value, 0)
+
+    def _scan_groups(self, col_name:str) -> dict:
+        """Value -> row mask dict by chunked column scan, unindexed columns."""
+
+        column = self.get_column(col_name)
+        groups = {}
+        start = 0
+        while start < self.length:
+            end = min(start + SCAN_CHUNK, self.length)
+            chunk = {}   # small per chunk masks, shifted once
+            bit = 1
+            for value in column[start:end]:
+                try:
+                    chunk[value] = chunk.get(value, 0) | bit
+                except TypeError:  # unhashable, not groupable
+                    pass
+                bit <<= 1
+            for value, cmask in chunk.items():
+                groups[value] = groups.get(value, 0) | (cmask << start)
+            start = end
+
+        return groups
+
+    def group_by(self, col_name:str, mask:int=None, agg:str=None, agg_col:str=None) -> dict:
+        """Return dict of column value -> row mask, using the Indexer masks
+           for col_name if indexed, otherwise a chunked column scan.  If agg
+           ( 'count', 'sum', 'min', 'max', 'mean' ) is given, return value ->
+           aggregate of agg_col over each group instead of the mask."""
+
+        groups = self._index_groups(col_name)
+
+        if groups is None:
+            groups = self._scan_groups(col_name)
+
+        if mask is not None:
+            groups = { k: m & mask for k, m in groups.items() if m & mask }
+
+        if agg is None:
+            return groups
+
+        if agg not in ('count', 'sum', 'min', 'max', 'mean'):
+            raise ListStoreError(f"Group By: unknown aggregate '{agg}'.")
+
+        if agg == 'count':
+            return { k: bit_count(m) for k, m in groups.items() }
+
+        agg_func = getattr(self, agg)
+
+        return { k: agg_func(agg_col, m) for k, m in groups.items() }
+
+    """ Memory Accounting Methods """
+
+    def _column_bytes(self, col_slot: int) -> int:
+
+        return values_size(self.store[col_slot])
+
+    def _changed_bytes(self) -> int:
+
+        return values_size(self.changed)
+
+    def _index_report(self) -> dict:
+
+        return self.indexer.memory_report() if self.indexer else {}
+
+    def memory_report(self) -> dict:
+        """Estimated bytes, for deciding what to index, encode or evict.
+           { 'columns': { col: bytes }, 'changed': bytes,
+             'index': { col: { 'masks': n, 'bytes': bytes } },
+             'orders': { col: bytes }, 'cursors': bytes, 'total': bytes }
+           Column bytes are the list plus its distinct values, sizes from
+           sys.getsizeof on CPython, estimates on micropython."""
+
+        report = {
+            'columns': { col: self._column_bytes(i) for i, col in enumerate(self.column_names) },
+            'changed': self._changed_bytes(),
+            'index': self._index_report(),
+            'orders': {},
+            'cursors': 0,
+        }
+
+        if self.orderer:   # values are shared with the column, lists only
+            report['orders'] = { col: sizeof(values) + values_size(slots)
+                                 for col, (values, slots) in self.orderer._orders.items() }
+
+        if self.cursors:
+            report['cursors'] = sum([ values_size(masks) + values_size(pops)
+                                      for masks, pops in self.cursors.values() ])
+
+        report['total'] = (sum(report['columns'].values()) + report['changed']
+                           + sum([ ix['bytes'] for ix in report['index'].values() ])
+                           + sum(report['orders'].values()) + report['cursors'])
+
+        return report
+
     """ Index Methods """
 
     def set_indexer(self, indexer_cls:'IndexerClass' = None, usertypes:list = None ):
@@ -496,6 +1125,158 @@ class ListStore(object):
         if self.indexer:
             self.indexer.reindex()
 
+    """ Sort Order Methods """
+
+    def set_orderer(self, orderer_cls:'OrdererClass' = None ):
+        """Create orderer with external *class*, same idea as set_indexer."""
+
+        if not orderer_cls or not isinstance(orderer_cls, type ):
+            raise ListStoreError('Set orderer function needs Orderer class.')
+
+        self.orderer = orderer_cls(self.column_names, self.store)
+
+    def order_attr(self, attr_name: str):
+        """Create maintained sort order for attr.column name"""
+
+        if self.orderer:
+            self.orderer.order_attr(attr_name)
+
+    def drop_order(self, attr_name: str):
+        """Delete sort order for attr.column name"""
+
+        if self.orderer:
+            self.orderer.drop_attr(attr_name)
+
+    def sorted_slots(self, col_name: str, reverse: bool = False, mask: int = None):
+        """Yield slots in column value order.  Uses the maintained order if
+           col_name is ordered, otherwise a one-off sort of slots."""
+
+        if self.orderer and col_name in self.orderer.ordered:
+            yield from self.orderer.sorted_slots(col_name, reverse, mask)
+            return
+
+        column = self.get_column(col_name)
+        slots = range(self.length) if mask is None else bit_indexes(mask)
+
+        yield from sorted(slots, key=lambda i: column[i], reverse=reverse)
+
+    def iter_sorted(self, col_name: str, reverse: bool = False, mask: int = None):
+        """Yield rows in column value order, optionally only rows in mask."""
+
+        for slot in self.sorted_slots(col_name, reverse, mask):
+            yield self.get_row(slot)
+
+    def top_k(self, col_name: str, k: int, mask: int = None) -> list:
+        """Rows with the k largest values in column, largest first."""
+
+        rows = []
+        for slot in self.sorted_slots(col_name, True, mask):
+            if len(rows) >= k:
+                break
+            rows.append(self.get_row(slot))
+
+        return rows
+
+    def bottom_k(self, col_name: str, k: int, mask: int = None) -> list:
+        """Rows with the k smallest values in column, smallest first."""
+
+        rows = []
+        for slot in self.sorted_slots(col_name, False, mask):
+            if len(rows) >= k:
+                break
+            rows.append(self.get_row(slot))
+
+        return rows
+
+
+class SnapshotMixin(object):
+    """Read-only view for ListStore.snapshot(), reads are bounded by the
+       length at the time of the snapshot.  No indexer or orderer, queries
+       use column scans.  Mutations raise ListStoreError."""
+
+    def __init__(self, source: ListStore):
+
+        self.column_names = source.column_names
+        self.defaults = source.defaults
+        self.store = list(source.store)   # column refs, not copies
+        self.changed = list(source.changed)
+        self.indexer = None
+        self.orderer = None
+        self._shared = None
+        self.cursors = None
+        self._version = 0   # never changes, mutations raise
+        self._length = source.length
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    def __iter__(self):
+
+        for i in range(self._length):
+            yield self.get_row(i)
+
+    def dump(self):
+
+        for i in range(self._length):
+            yield self.get_row(i)
+
+    def check_slot(self, slot: int):
+
+        if slot < 0 or slot >= self._length:
+            raise ListStoreError(f"Slot number {slot} not in snapshot of length {self._length}.")
+
+    def get(self, slot: int, col_name: str):
+
+        self.check_slot(slot)
+
+        return self.store[self.slot_for_col(col_name)][slot]
+
+    def get_column(self, col_name: str) -> list:
+        """Column values as of the snapshot, a copy only if the
+           source has appended since."""
+
+        column = self.store[self.slot_for_col(col_name)]
+
+        if len(column) == self._length:
+            return column
+
+        return column[:self._length]
+
+    def find(self, col_name: str, value, start=0) -> int:
+
+        try:
+            i = self.store[self.slot_for_col(col_name)].index(value, start, self._length)
+        except ValueError:
+            i = -1
+
+        return i
+
+    def find_all(self, col_name: str, value) -> list[int]:
+
+        il = []
+        i = self.find(col_name, value)
+
+        while i > -1:
+            il.append(i)
+            i = self.find(col_name, value, i + 1)
+
+        return il
+
+    def _read_only(self, *args, **kwargs):
+        raise ListStoreError("Snapshot is read-only.")
+
+    set = append = extend = pop = clear = _read_only
+    reset_changed = fetch_row = snapshot = _read_only
+    set_indexer = set_orderer = open_cursor = _read_only
+
+
+class ListSnapshot(SnapshotMixin, ListStore):
+    pass
+
+
+ListStore._snapshot_cls = ListSnapshot
+
 
 class TupleStoreError(Exception):
     pass
@@ -568,6 +1349,20 @@ class TupleStore(ListStore):
         yield from [self.ntuple_factory(*row) for row in zip(*self.store)]
 
 
+class TupleSnapshot(SnapshotMixin, TupleStore):
+    """Snapshot of TupleStore, or subclass, rows are namedtuples."""
+
+    def __init__(self, source: TupleStore):
+
+        super().__init__(source)
+
+        self.nt_name = source.nt_name
+        self.ntuple_factory = source.ntuple_factory
+
+
+TupleStore._snapshot_cls = TupleSnapshot
+
+
 
 
 def display_store(lstore):
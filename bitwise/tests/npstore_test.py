@@ -0,0 +1,111 @@
+try:
+    from gc import mem_free, collect
+    gc_present = True
+    mem_start = mem_free()
+except ImportError:
+    gc_present = False
+
+try:
+    import fsinit
+except ImportError:
+    import tests.fsinit as fsinit
+del(fsinit)
+
+
+from lib.npstore import NumpyStore, HAVE_NUMPY
+from lib.tuplestore import display_store
+
+
+if __name__ == "__main__":
+
+    nl = print
+
+    print("Test Script for NumpyStore ")
+    print("NumPy available: ", HAVE_NUMPY, "" if HAVE_NUMPY else " ( plain TupleStore lists )")
+    nl()
+
+    if gc_present:
+        main_start = mem_free()
+
+    from lib.indexer import Indexer
+
+    print("ns = NumpyStore('Reading', ['sensor', 'temp', 'count'], dtypes={'temp': 'f8', 'count': 'i8'})")
+    ns = NumpyStore("Reading", ["sensor", "temp", "count"],
+                    dtypes={"temp": "f8", "count": "i8"})
+    ns.set_indexer(Indexer)
+    ns.index_attr("sensor")
+    nl()
+
+    readings = [["room" if i % 3 else "attic", 18.0 + i * 1.5, i] for i in range(12)]
+
+    print("ns.extend(12 readings), ns.append(['attic', 35.0, 12])")
+    ns.extend(readings)
+    ns.append(["attic", 35.0, 12])
+    nl()
+
+    display_store(ns)
+
+    print("ns.is_array('temp'), ns.is_array('sensor') ", ns.is_array("temp"), ns.is_array("sensor"))
+    print("ns.get_row(4) ", ns.get_row(4))
+    nl()
+
+    hot = ns.where("temp", "gt", 30.0)
+    print("hot = ns.where('temp', 'gt', 30.0) ", bin(hot))
+    print("hot & ns.index['sensor']['attic'] ", bin(hot & ns.index["sensor"]["attic"]))
+    print("ns.where('count', 'btwe', 3, 6) ", bin(ns.where("count", "btwe", 3, 6)))
+    print("ns.where('count', 'in', [1, 5, 9]) ", bin(ns.where("count", "in", [1, 5, 9])))
+    nl()
+
+    print("ns.sum('count') ", ns.sum("count"))
+    print("ns.mean('temp', hot) ", ns.mean("temp", hot))
+    print("ns.min('temp'), ns.max('temp') ", ns.min("temp"), ns.max("temp"))
+    print("ns.max_slot('temp', ns.index['sensor']['room']) ",
+          ns.max_slot("temp", ns.index["sensor"]["room"]))
+    print("ns.group_by('sensor', agg='mean', agg_col='temp') ",
+          ns.group_by("sensor", agg="mean", agg_col="temp"))
+    nl()
+
+    print("ns.pop(0) ", ns.pop(0))
+    print("ns.set(0, 'temp', 99.5), ns.get(0, 'temp') ", end="")
+    ns.set(0, "temp", 99.5)
+    print(ns.get(0, "temp"))
+    nl()
+
+    if HAVE_NUMPY:
+        try:
+            ns.index_attr("temp")
+        except Exception as e:
+            print("Index array column error: ", e)
+        try:
+            ns.append(["room", "hot", 1])
+        except Exception as e:
+            print("Bad value error: ", e)
+        nl()
+
+    print("=== Export, array values as Python values ===")
+    nl()
+
+    import os
+    from lib.storeio import export_ndjson, export_csv
+
+    print("export_ndjson(ns, 'readings.ndjson', mask=ns.where('temp', 'gt', 30.0)), rows ",
+          export_ndjson(ns, "readings.ndjson", mask=ns.where("temp", "gt", 30.0)))
+    with open("readings.ndjson") as jfile:
+        print(jfile.readline().strip())
+    print("export_csv(ns, 'readings.csv'), rows ", export_csv(ns, "readings.csv"))
+    os.remove("readings.ndjson")
+    os.remove("readings.csv")
+    nl()
+
+    print("End of Test")
+    nl()
+
+    if gc_present:
+        main_end = mem_free()
+        print("=== Memory Usage for MicroPython ===")
+        print("Total memory started: ", mem_start)
+        print("Memory use to start of __main___ :", mem_start - main_start)
+        print("Total memory used: ", mem_start - main_end)
+        collect()
+        print("Mem after collect: ", mem_start - mem_free())
+        nl()
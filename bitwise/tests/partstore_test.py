@@ -0,0 +1,95 @@
+try:
+    from gc import mem_free, collect
+    gc_present = True
+    mem_start = mem_free()
+except ImportError:
+    gc_present = False
+
+try:
+    import fsinit
+except ImportError:
+    import tests.fsinit as fsinit
+del(fsinit)
+
+import os
+
+from lib.partstore import PartitionedStore
+
+
+if __name__ == "__main__":
+
+    nl = print
+
+    print("Test Script for PartitionedStore ")
+    nl()
+
+    if gc_present:
+        main_start = mem_free()
+
+    from lib.indexer import Indexer
+
+    print("ps = PartitionedStore('Reading', ['time', 'sensor', 'temp'], time_col='time', period='day')")
+    ps = PartitionedStore("Reading", ["time", "sensor", "temp"], time_col="time", period="day")
+    ps.set_indexer(Indexer)
+    ps.index_attr("sensor")
+    nl()
+
+    readings = [[(2024, 6, 1 + i // 4, (i % 4) * 6, 0, 0), ("room", "attic", "porch")[i % 3],
+                 20.0 + i / 2] for i in range(20)]
+    ps.extend(readings)
+
+    print("ps.length, partitions ", ps.length, ps.partitions)
+    for key in ps.partitions:
+        print("partition ", key, " rows ", ps.partition(key).length, " bounds ", ps.bounds(key))
+    nl()
+
+    start, end = (2024, 6, 2, 12), (2024, 6, 4)
+    print("ps.partition_keys(start=(2024, 6, 2, 12), end=(2024, 6, 4)) ",
+          ps.partition_keys(start, end))
+    hits = ps.where("temp", "gt", 23.0, start=start, end=end)
+    print("ps.where('temp', 'gt', 23.0, start, end) ", [(k, bin(m)) for k, m in hits])
+    for tp in ps.get_rows(hits):
+        print(tp)
+    nl()
+
+    hits = ps.index_mask("sensor", "attic", start=start)
+    print("ps.index_mask('sensor', 'attic', start=start), rows ", ps.count(hits))
+    for tp in ps.get_rows(hits):
+        print(tp)
+    nl()
+
+    print("ps.archive(before=(2024, 6, 3)), save and drop ")
+    archived = ps.archive(before=(2024, 6, 3))
+    print(archived)
+    print("ps.length, partitions ", ps.length, ps.partitions)
+    nl()
+
+    print("ps.load_partition(filename), rows ",
+          [ps.load_partition(filename) for _, filename in archived])
+    print("ps.length, partitions ", ps.length, ps.partitions)
+    for _, filename in archived:
+        os.remove(filename)
+    nl()
+
+    print("ps.memory_report() ", ps.memory_report())
+    nl()
+
+    print("ps5 = PartitionedStore(..., period=5), N rows per partition ")
+    ps5 = PartitionedStore("Reading", ["time", "sensor", "temp"], time_col="time", period=5)
+    ps5.extend(readings[:12])
+    print("partitions ", ps5.partitions, " bounds ", [ps5.bounds(k) for k in ps5.partitions])
+    print("ps5.time_range(start=(2024, 6, 3)) ", [(k, bin(m)) for k, m in ps5.time_range(start=(2024, 6, 3))])
+    nl()
+
+    print("End of Test")
+    nl()
+
+    if gc_present:
+        main_end = mem_free()
+        print("=== Memory Usage for MicroPython ===")
+        print("Total memory started: ", mem_start)
+        print("Memory use to start of __main___ :", mem_start - main_start)
+        print("Total memory used: ", mem_start - main_end)
+        collect()
+        print("Mem after collect: ", mem_start - mem_free())
+        nl()
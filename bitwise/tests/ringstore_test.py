@@ -0,0 +1,113 @@
+try:
+    from gc import mem_free, collect
+    gc_present = True
+    mem_start = mem_free()
+except ImportError:
+    gc_present = False
+
+try:
+    import fsinit
+except ImportError:
+    import tests.fsinit as fsinit
+del(fsinit)
+
+
+from lib.ringstore import RingStore
+from lib.tuplestore import display_store
+
+
+if __name__ == "__main__":
+
+    nl = print
+
+    print("Test Script for RingStore ")
+    nl()
+
+    if gc_present:
+        main_start = mem_free()
+
+    from lib.indexer import Indexer
+
+    print("rs = RingStore('Reading', ['seq', 'sensor', 'temp'], capacity=6)")
+    rs = RingStore("Reading", ["seq", "sensor", "temp"], capacity=6)
+    rs.set_indexer(Indexer)
+    rs.index_attr("sensor")
+    nl()
+
+    readings = [[i, "room" if i % 2 else "attic", 20.0 + i / 2] for i in range(10)]
+
+    print("Append 10 readings to a ring of 6, oldest 4 evicted")
+    for r in readings:
+        rs.append(r)
+    nl()
+
+    display_store(rs)
+
+    print("rs.length, rs.capacity, rs.first_seq ", rs.length, rs.capacity, rs.first_seq)
+    print("rs.seq_to_slot(3), rs.seq_to_slot(7) ", rs.seq_to_slot(3), rs.seq_to_slot(7))
+    nl()
+
+    print("Iterate, oldest first")
+    for tp in rs:
+        print(tp)
+    nl()
+
+    print("rs.index_mask('sensor', 'room') ", bin(rs.index_mask("sensor", "room")))
+    print("rs.get_rows(rs.index['sensor']['room'])")
+    for tp in rs.get_rows(rs.index["sensor"]["room"]):
+        print(tp)
+    nl()
+
+    print("rs.mean('temp', rs.where('temp', 'gt', 23.0)) ",
+          rs.mean("temp", rs.where("temp", "gt", 23.0)))
+    print("rs.group_by('sensor', agg='max', agg_col='temp') ",
+          rs.group_by("sensor", agg="max", agg_col="temp"))
+    nl()
+
+    print("rs.reset_changed(), rs.append([10, 'room', 25.5])")
+    rs.reset_changed()
+    rs.append([10, "room", 25.5])
+    print("rs.rows_changed() ", bin(rs.rows_changed()), " newest slot ", rs.length - 1)
+    nl()
+
+    print("rs.pop(0) ", rs.pop(0))
+    try:
+        rs.pop(2)
+    except Exception as e:
+        print("Pop middle error: ", e)
+    nl()
+
+    print("rs.upsert_many([[rs.get(1, 'seq'), 'room', 30.0], [11, 'hall', 19.0]], ['seq'])")
+    useq = rs.get(1, "seq")
+    print(rs.upsert_many([[useq, "room", 30.0], [11, "hall", 19.0]], ["seq"]))
+    print("rs.get_row(rs.find_all('seq', useq)[0]) ", rs.get_row(rs.find_all("seq", useq)[0]))
+    print("rs.get_row(rs.length - 1) ", rs.get_row(rs.length - 1))
+    nl()
+
+    print("small = RingStore('Pair', ['key', 'val'], capacity=2), keys 1 and 2")
+    small = RingStore("Pair", ["key", "val"], capacity=2)
+    small.extend([[1, "a"], [2, "b"]])
+    print("small.upsert_many([[3, 'c'], [1, 'A']], ['key']), key 1 would be evicted, appended instead")
+    print(small.upsert_many([[3, "c"], [1, "A"]], ["key"]))
+    for tp in small:
+        print(tp)
+    print("small.upsert_many([[4, 'd'], [5, 'e'], [6, 'f']], ['key']), more than capacity")
+    print(small.upsert_many([[4, "d"], [5, "e"], [6, "f"]], ["key"]), " rows ", list(small))
+    nl()
+
+    print("list(rs.ireindex(chunk_size=2)), positions done per chunk ", list(rs.ireindex(chunk_size=2)))
+    print("rs.index['sensor'] ", rs.index["sensor"])
+    nl()
+
+    print("End of Test")
+    nl()
+
+    if gc_present:
+        main_end = mem_free()
+        print("=== Memory Usage for MicroPython ===")
+        print("Total memory started: ", mem_start)
+        print("Memory use to start of __main___ :", mem_start - main_start)
+        print("Total memory used: ", mem_start - main_end)
+        collect()
+        print("Mem after collect: ", mem_start - mem_free())
+        nl()
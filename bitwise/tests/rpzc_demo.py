@@ -35,7 +35,7 @@ except ImportError:
 del(fsinit)
 
 from tablestore import TableStore, TableDef, ColDef, display_table, TableStoreError
-from tablestore import DataStore, DataStoreDef, RelationDef, ColDef, display_dbdef
+from tablestore import DataStore, DataStoreDef, RelationDef, ColDef, display_dbdef, DataStoreError
 
 """User Types"""
 
@@ -62,25 +62,18 @@ class Members(TableStore):
 
     @property
     def oldest_member(self):
-        """Need way to formalize"""
 
-
-        row = min(iter(self),
-                      key = lambda x:x[self.slot_for_col('date_joined')])
-
-        return row[self.slot_for_col('name')]
+        return self.get_column('name')[self.min_slot('date_joined')]
 
     @property
     def num_RPZs(self):
 
-        return sum(self.get_column('num_RPZeros'))
+        return self.sum('num_RPZeros')
 
     @property
     def inactive_members(self):
 
-        pmems = set(self.db.ProjectMember.get_column('member'))
-
-        return [ mem for mem in self.members if mem not in pmems ]
+        return self.db.query('Member').not_exists('ProjectMember').values('name')
 
 
 class Projects(TableStore):
@@ -368,6 +361,14 @@ if __name__=='__main__':
     print('Project Benefactors ', projmems.benefactors)
     nl()
 
+    from join import join
+
+    print("join(mems, 'name', projmems, 'member', how='left', project=['name', 'projname', 'projrole'])")
+    for jt in join(mems, 'name', projmems, 'member', how='left',
+                   project=['name', 'projname', 'projrole']):
+        print(jt)
+    nl()
+
     rdata = [['time', 'hours', 'volunteer time'],
              ['parts', 'dollars', 'money' ],
              ['materials', 'dollars', 'money' ],
@@ -457,6 +458,71 @@ if __name__=='__main__':
     rpzdb2.load_all()
     print()
 
+    print('Memory report, estimated bytes per table ...')
+    mreport = rpzdb2.memory_report()
+    for tname, trep in mreport['tables'].items():
+        print(f"{tname:16} total {trep['total']:6}  columns {sum(trep['columns'].values()):6}  changed {trep['changed']:4}")
+    print('DB total ', mreport['total'])
+    print()
+
+    print('Lazy reload, tables load on first access ...')
+    rpzdb3 = RPZeroClub()
+    rpzdb3.load_all(lazy=True)
+    print('loaded ', rpzdb3.loaded())
+    print('Role rows ', rpzdb3.Role.length)
+    print('loaded ', rpzdb3.loaded())
+    rpzdb3.preload(['Resource'])
+    print('loaded after preload ', rpzdb3.loaded())
+    del rpzdb3
+    print()
+
+    print('Relation levels, load order ', rpzdb2.relation_levels())
+    print()
+
+    print('Transaction, children before parent, checked at commit ...')
+    with rpzdb2.transaction():
+        rpzdb2.ProjectMember.extend([['Robot Arm', 'Bill', 'projectleader'], ['Robot Arm', 'Sally']])
+        rpzdb2.Project.append(['Robot Arm', 'Pick and place', []])
+    print(rpzdb2.ProjectMember.get_rows(rpzdb2.ProjectMember.find_all('projname', 'Robot Arm')))
+    try:
+        with rpzdb2.transaction():
+            rpzdb2.Project.pop(['Robot Arm'])
+    except DataStoreError as e:
+        print('Rolled back: ', e)
+    print('Robot Arm project ', rpzdb2.Project.get_key(['Robot Arm']))
+    print('Columns still marked shared after the transactions ', rpzdb2.Project._shared)
+    scan = rpzdb2.Project.ifind_all('projname', 'Robot Arm', chunk_size=1)
+    next(scan)
+    try:
+        with rpzdb2.transaction():
+            rpzdb2.Project.pop(['Robot Arm'])
+    except DataStoreError:
+        pass
+    try:
+        list(scan)
+    except Exception as e:
+        print('Scan across a rolled back transaction: ', e)
+    print()
+
+    print("Cascading rename, 'Robot Arm' to 'Robot Hand', members follow ...")
+    rpzdb2.Project.rename(['Robot Arm'], ['Robot Hand'])
+    print(rpzdb2.ProjectMember.get_rows(rpzdb2.ProjectMember.find_all('projname', 'Robot Hand')))
+    print("Cascading pop of 'Robot Hand' ", rpzdb2.Project.pop(['Robot Hand'], cascade=True))
+    print('Members left ', rpzdb2.ProjectMember.find_all('projname', 'Robot Hand'))
+    print()
+
+    print('Queries along relations ...')
+    q = rpzdb2.query('Project').join('ProjectResource').where('amount', 'gt', 50.0)
+    print("Project resources over 50 ", q.select('Project.projname', 'resource', 'amount'))
+    print('Spending by project ', rpzdb2.query('ProjectResource').group_by('projname', 'sum', 'amount'))
+    q = rpzdb2.query('Resource').join('ProjectResource')
+    print('Spending by unit ', q.group_by('Resource.unit', 'sum', 'amount'))
+    helpers = rpzdb2.query('ProjectMember').where('projrole', 'eq', 'helper')
+    print('Members helping ', rpzdb2.query('Member').exists(helpers).values('name'))
+    q = rpzdb2.query('Member').join('ProjectMember').join('Project').join('Event')
+    print('Events per member ', q.group_by('Member.name', 'count'))
+    print()
+
 
     # print('locals()')
     # print(locals())
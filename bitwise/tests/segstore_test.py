@@ -0,0 +1,102 @@
+try:
+    from gc import mem_free, collect
+    gc_present = True
+    mem_start = mem_free()
+except ImportError:
+    gc_present = False
+
+try:
+    import fsinit
+except ImportError:
+    import tests.fsinit as fsinit
+del(fsinit)
+
+
+from lib.segstore import SegmentStore
+
+
+if __name__ == "__main__":
+
+    nl = print
+
+    print("Test Script for SegmentStore ")
+    nl()
+
+    if gc_present:
+        main_start = mem_free()
+
+    from lib.indexer import Indexer
+
+    print("ss = SegmentStore('Reading', ['seq', 'sensor', 'temp'], segment_size=4)")
+    ss = SegmentStore("Reading", ["seq", "sensor", "temp"], segment_size=4)
+    ss.set_indexer(Indexer)
+    ss.index_attr("sensor")
+    nl()
+
+    ss.extend([[i, ("room", "attic", "porch")[i % 3], 20.0 + i / 2] for i in range(10)])
+
+    print("ss.length, number of segments ", ss.length, len(ss.segments))
+    for n, seg in enumerate(ss.segments):
+        print("segment ", n, " start ", ss._starts[n], " sensor ", seg.store[1],
+              " index ", seg.index["sensor"])
+    nl()
+
+    print("ss.index_mask('sensor', 'attic') ", bin(ss.index_mask("sensor", "attic")))
+    bmask = ss.index_mask("sensor", "attic") & ss.where("temp", "gt", 21.0)
+    print("ss.index_mask('sensor', 'attic') & ss.where('temp', 'gt', 21.0) ", bin(bmask))
+    for tp in ss.get_rows(bmask):
+        print(tp)
+    nl()
+
+    print("ss.reset_changed(), ss.set(5, 'temp', 0.0), ss.pop(1)")
+    ss.reset_changed()
+    ss.set(5, "temp", 0.0)
+    print("popped ", ss.pop(1))
+    print("ss.rows_changed() ", bin(ss.rows_changed()))
+    print("segment lengths ", [seg.length for seg in ss.segments], " starts ", ss._starts)
+    nl()
+
+    print("ss.group_by('sensor', agg='mean', agg_col='temp') ",
+          ss.group_by("sensor", agg="mean", agg_col="temp"))
+    nl()
+
+    print("ss.compact()")
+    ss.compact()
+    print("segment lengths ", [seg.length for seg in ss.segments], " starts ", ss._starts)
+    print("ss.rows_changed() ", bin(ss.rows_changed()))
+    nl()
+
+    print("ss.upsert_many([[ss.get(5, 'seq'), 'attic', 30.0], [99, 'hall', 19.0]], ['seq'])")
+    useq = ss.get(5, "seq")
+    print(ss.upsert_many([[useq, "attic", 30.0], [99, "hall", 19.0]], ["seq"]))
+    print("ss.get_row(5) ", ss.get_row(5))
+    print("ss.index_mask('sensor', 'attic') ", bin(ss.index_mask("sensor", "attic")))
+    print("ss.get_row(ss.length - 1) ", ss.get_row(ss.length - 1))
+    nl()
+
+    print("fs = SegmentStore('Float', ['temp'], segment_size=2), set_indexer(Indexer, usertypes=[float])")
+    fs = SegmentStore("Float", ["temp"], segment_size=2)
+    fs.set_indexer(Indexer, usertypes=[float])
+    fs.index_attr("temp")
+    fs.extend([[21.5], [22.0], [21.5]])
+    print("fs.index_mask('temp', 21.5) ", bin(fs.index_mask("temp", 21.5)))
+    nl()
+
+    try:
+        ss.store = []
+    except AttributeError as e:
+        print("Assign store error: ", e)
+    nl()
+
+    print("End of Test")
+    nl()
+
+    if gc_present:
+        main_end = mem_free()
+        print("=== Memory Usage for MicroPython ===")
+        print("Total memory started: ", mem_start)
+        print("Memory use to start of __main___ :", mem_start - main_start)
+        print("Total memory used: ", mem_start - main_end)
+        collect()
+        print("Mem after collect: ", mem_start - mem_free())
+        nl()
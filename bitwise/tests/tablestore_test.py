@@ -266,6 +266,15 @@ if __name__ == '__main__':
     nl()
     print("Note that 'hello' and {'one':1} pass as lists ( int 1 gets lost ). May need strict types, isinstance ?")
     nl()
+    print("Compiled checks, isinstance first, test_type only as fallback ")
+    print("tstore2.compile_validator(str) ", tstore2.compile_validator(str), " any value passes")
+    check7 = tstore2.compile_validator(tstore2.ptypes[tstore2.slot_for_col('col7')])
+    print("col7 namedtuple arity check (1, 2, 3) ", check7((1, 2, 3)), " (1, 2) ", check7((1, 2)))
+    nl()
+    print("Chunked, 3 values per step, tstore2.icheck_column_types('col3', vl, chunk_size=3)")
+    for errs in tstore2.icheck_column_types('col3', vl, chunk_size=3):
+        print('  errors so far ', len(errs))
+    nl()
     print("get_column('col3') ", tstore2.get_column('col3'))
     print("sum(get_column('col3')) ", sum(tstore2.get_column('col3')))
     nl()
@@ -382,9 +391,27 @@ if __name__ == '__main__':
     nl()
     print('Columns changed ', [bin(i) for i in cht.changed] )
     print('Rows changed   ', bin(cht.rows_changed()) )
-    nl()       
-    
-    
+    nl()
+
+    print('Upsert, update rows with existing key, append new keys')
+    upserts = [[ 'a', 'y', 'upserted a.y'],
+               [ 'c', 'x', 'new c.x'],
+               [ 'b', 'y', 'testing b.y']]
+    print("cht.upsert_many(upserts) ", cht.upsert_many(upserts))
+    print("cht.get_key(['a', 'y'])  ", cht.get_key(['a', 'y']))
+    try:
+        cht.upsert_many([[ 'q', 'x', 'no parent q']])
+    except Exception as e:
+        print('Upsert no parent error: ', e)
+    print('Rows changed   ', bin(cht.rows_changed()) )
+    nl()
+
+    print('Maintained relation keys, parent key counts and child reference counts')
+    for rel, refs in tdb.relation_keys.items():
+        print(rel.parent, rel.pcol, '->', rel.child, rel.ccol, ' parents ', refs.parents, ' children ', refs.children)
+    print("tdb.partable2.children_exist(['z', '']) ", tdb.partable2.children_exist(['z', '']), ", no scan of chtable")
+    nl()
+
     print('DB save, using tdb.save_all')
     tdb.save_all()
     nl()
@@ -392,7 +419,92 @@ if __name__ == '__main__':
     print('Create new DB and load, tdb.load_all')
     tdb2.load_all()
     nl()
-    
+    tdb3 = DataStore(dbdef)
+    print('Trusted load, checksum and schema match .chk from save, tdb3.load_all(trusted=True)')
+    tdb3.load_all(trusted=True)
+    print('same rows as validated load ', [ list(t.dump()) == list(tdb2.table(n).dump()) for n, t in tdb3.tables() ])
+    print('same relation keys ', [ (r.parents, r.children) for r in tdb3.relation_keys.values() ] ==
+                                 [ (r.parents, r.children) for r in tdb2.relation_keys.values() ])
+    print('Trusted load into a table with rows is validated, duplicate keys caught')
+    try:
+        tdb3.partable1.load(tdb3.dirname + '/partable1', trusted=True)
+    except Exception as e:
+        print('Load error: ', e)
+    print('tdb3.partable1.length ', tdb3.partable1.length, ' tdb2.partable1.length ', tdb2.partable1.length)
+    nl()
+    print('Columnar save, one array per column, tdb3.save_all(columnar=True)')
+    tdb3.save_all(columnar=True)
+    with open(tdb3.dirname + '/chtable.json') as jfile:
+        print('chtable.json ', jfile.read())
+    tdb4 = DataStore(dbdef)
+    tdb4.load_all(trusted=True)
+    print('same rows after columnar load ', [ list(t.dump()) == list(tdb2.table(n).dump()) for n, t in tdb4.tables() ])
+    nl()
+    print('Journal, tdb4.open_journal(), a few changes, then tdb4.save_changes()')
+    tdb4.open_journal()
+    tdb4.chtable.set([ 'c', 'x'], 'col3', 'journaled c.x')
+    tdb4.chtable.pop([ 'b', 'z'])
+    tdb4.partable1.append([ 'd', 'test d '])
+    print('records written ', tdb4.save_changes())
+    with open(tdb4.dirname + '/chtable.log') as lfile:
+        print('chtable.log ', lfile.read())
+    tdb5 = DataStore(dbdef)
+    tdb5.load_all()
+    print('snapshot + journal same as tdb4 ', [ list(t.dump()) == list(tdb4.table(n).dump()) for n, t in tdb5.tables() ])
+    print('tdb4.checkpoint(), full save, journals start over ')
+    tdb4.checkpoint()
+    nl()
+    print('Crash windows in a checkpoint, the old .log must not replay onto the new snapshot')
+    tdb4.open_journal()
+    print('pop ', tdb4.chtable.pop(tdb4.chtable.make_key(list(tdb4.chtable.get_row(0)))))
+    tdb4.save_changes()
+    chname = tdb4.dirname + '/chtable'
+    old_files = {}
+    for ext in ('.chk', '.log'):
+        with open(chname + ext) as f:
+            old_files[ext] = f.read()
+    tdb4.checkpoint()
+    for crash, exts in (('after new .json ', ('.chk', '.log')), ('after new .chk  ', ('.log',))):
+        chk_now = open(chname + '.chk').read()
+        for ext in exts:   # as left by the crash
+            with open(chname + ext, 'w') as f:
+                f.write(old_files[ext])
+        tdb6 = DataStore(dbdef)
+        tdb6.load_all()
+        print(crash, 'same as tdb4 ', [ list(t.dump()) == list(tdb4.table(n).dump()) for n, t in tdb6.tables() ])
+        with open(chname + '.chk', 'w') as f:
+            f.write(chk_now)
+    os.remove(chname + '.log')
+    nl()
+    print('Lazy load of a chain of tables, grand -> parent -> child, then cascading pop')
+    chain_def = DataStoreDef( dbname = 'Chain', dirname = 'testdata',
+                    relations = [ RelationDef( 'grand', 'g', 'parent', 'g'),
+                                  RelationDef( 'parent', 'p', 'child', 'p')],
+                    table_defs = [ DBTableDef( name, filename = name, ttype=TableStore, unique = [ cols[0] ],
+                                        col_defs = [ ColDef(cname=c, default='', ptype=str) for c in cols ])
+                                   for name, cols in (('grand', ['g']), ('parent', ['p', 'g']), ('child', ['c', 'p'])) ])
+    cdb = DataStore(chain_def)
+    cdb.grand.extend([['g1'], ['g2']])
+    cdb.parent.extend([['p1', 'g1'], ['p2', 'g2']])
+    cdb.child.extend([['c1', 'p1'], ['c2', 'p2']])
+    cdb.save_all()
+    cdb2 = DataStore(chain_def)
+    cdb2.load_all(lazy=True)
+    print("cdb2.grand.pop(['g1'], cascade=True) ", cdb2.grand.pop(['g1'], cascade=True))
+    print('loaded ', cdb2.loaded(), ' rows ', { n: t.length for n, t in cdb2.tables() })
+    cdb2.load_all()   # the rest, nothing loaded twice
+    print('after eager load_all ', { n: t.length for n, t in cdb2.tables() })
+    cdb2.save_all()
+    cdb3 = DataStore(chain_def)
+    cdb3.load_all()
+    print('reloaded ', { n: list(t.dump()) for n, t in cdb3.tables() })
+    cdb4 = DataStore(chain_def)
+    cdb4.load_all(lazy=True, trusted=True)
+    print('lazy, grand rows ', cdb4.grand.length, ' loaded ', cdb4.loaded())
+    cdb4.load_all(trusted=True)
+    print('then eager load_all ', { n: t.length for n, t in cdb4.tables() })
+    nl()
+
     print('Examining parent and child tables ... using attrs.')
     nl()
     par2t = tdb2.partable2
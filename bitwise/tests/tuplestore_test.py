@@ -442,6 +442,197 @@ if __name__ == "__main__":
     for tp in ntstore.get_rows(bmask):
         print(tp)
     nl()
+
+    print("=== Where Queries, column scans ===")
+    nl()
+
+    print("ntstore.where('ddd', 'gt', 30) ", bin(ntstore.where("ddd", "gt", 30)))
+    print(ntstore.get_rows(ntstore.where("ddd", "gt", 30)))
+    nl()
+
+    print("ntstore.where('bbb', 'in', ['never', 'occasionally'])")
+    for tp in ntstore.get_rows(ntstore.where("bbb", "in", ["never", "occasionally"])):
+        print(tp)
+    lstore = TupleStore(nt_name="Mixed", column_defs=["val"])
+    lstore.extend([[1], [[2, 3]], [4]])
+    print("lstore values [1, [2, 3], 4], unhashable list not in the set")
+    print("lstore.where('val', 'notin', [1, 5]) ", bin(lstore.where("val", "notin", [1, 5])),
+          " 'in' ", bin(lstore.where("val", "in", [1, 5])))
+    try:
+        lstore.where("val", "all_eq", [1])
+    except Exception as e:
+        print("Where operator error: ", e)
+    nl()
+
+    print("ntstore.where('ddd', 'btw', 20, 50) & ntstore.index['aaa']['test2']")
+    bmask = ntstore.where("ddd", "btw", 20, 50) & ntstore.index["aaa"]["test2"]
+    print("bmask ", bin(bmask))
+    for tp in ntstore.get_rows(bmask):
+        print(tp)
+    nl()
+
+    print("Chunked scan, ntstore.iwhere('ccc', 'ne', 'loot-based', chunk_size=4)")
+    for step_mask in ntstore.iwhere("ccc", "ne", "loot-based", chunk_size=4):
+        print("step mask ", bin(step_mask))
+    nl()
+
+    print("=== Aggregates, no row construction ===")
+    nl()
+
+    bmask = ntstore.where("ddd", "gt", 20)
+    print("bmask = ntstore.where('ddd', 'gt', 20) ", bin(bmask))
+    print("ntstore.count(bmask)       ", ntstore.count(bmask))
+    print("ntstore.sum('ddd', bmask)  ", ntstore.sum("ddd", bmask))
+    print("ntstore.min('ddd', bmask)  ", ntstore.min("ddd", bmask))
+    print("ntstore.max('ddd', bmask)  ", ntstore.max("ddd", bmask))
+    print("ntstore.mean('ddd', bmask) ", ntstore.mean("ddd", bmask))
+    print("ntstore.max_slot('ddd', bmask) ", ntstore.max_slot("ddd", bmask))
+    nl()
+    print("ntstore.group_by('aaa')  ( indexed ) ", ntstore.group_by("aaa"))
+    print("ntstore.group_by('ccc', agg='count') ", ntstore.group_by("ccc", agg="count"))
+    print("ntstore.group_by('aaa', bmask, 'sum', 'ddd') ",
+          ntstore.group_by("aaa", bmask, "sum", "ddd"))
+    nl()
+
+    print("=== Maintained Sort Orders ===")
+    nl()
+
+    from lib.orderer import Orderer
+
+    print("ntstore.set_orderer(Orderer), ntstore.order_attr('aaa')")
+    ntstore.set_orderer(Orderer)
+    ntstore.order_attr("aaa")
+    nl()
+    ntstore.append(("test0", "seldom", "rule-based", 7))
+    ntstore.set(2, "aaa", "tesxy")
+    print("after append 'test0' and set(2, 'aaa', 'tesxy'), iter_sorted('aaa')")
+    for tp in ntstore.iter_sorted("aaa"):
+        print(tp)
+    nl()
+    print("ntstore.top_k('aaa', 2) ", ntstore.top_k("aaa", 2))
+    print("ntstore.bottom_k('aaa', 2, ntstore.index['bbb']['often']) ")
+    for tp in ntstore.bottom_k("aaa", 2, ntstore.index["bbb"]["often"]):
+        print(tp)
+    print("ntstore.set(0, 'aaa', 99), not sortable with str, store unchanged")
+    try:
+        ntstore.set(0, "aaa", 99)
+    except Exception as e:
+        print("Set error: ", e)
+    print("ntstore.get(0, 'aaa') ", ntstore.get(0, "aaa"), " ordered ", ntstore.orderer.ordered)
+    nl()
+
+    print("=== Snapshots, copy on write ===")
+    nl()
+
+    snap = ntstore.snapshot()
+    print("snap = ntstore.snapshot(), snap.length ", snap.length)
+    ntstore.append(("test9", "never", "rule-based", 0))
+    ntstore.set(0, "ccc", "snapshot-based")
+    print("after append and set(0, 'ccc', ...) ntstore.length ", ntstore.length,
+          " snap.length ", snap.length)
+    print("ntstore.get_row(0) ", ntstore.get_row(0))
+    print("snap.get_row(0)    ", snap.get_row(0))
+    print("column still shared ", [ntstore.store[i] is snap.store[i] for i in range(4)])
+    print("snap.count(snap.where('aaa', 'eq', 'test2')) ",
+          snap.count(snap.where("aaa", "eq", "test2")))
+    try:
+        snap.set(0, "ccc", "no-based")
+    except Exception as e:
+        print("Snapshot set error: ", e)
+    nl()
+
+    print("=== Upsert ===")
+    nl()
+
+    batch = [("test9", "always"), ("test11", "often"), ("test2", "often", "rule-based", 2)]
+    print("ntstore.upsert_many(batch, ['aaa']) ", ntstore.upsert_many(batch, ["aaa"]))
+    print("ntstore.get_rows(ntstore.index['aaa']['test9'] | ntstore.index['aaa']['test11'])")
+    for tp in ntstore.get_rows(ntstore.index["aaa"]["test9"] | ntstore.index["aaa"]["test11"]):
+        print(tp)
+    nl()
+
+    print("=== Chunked Scans ===")
+    nl()
+
+    from lib.core.steps import run_steps
+
+    print("ntstore.ifind_all('bbb', 'often', chunk_size=3) ")
+    for slots in ntstore.ifind_all("bbb", "often", chunk_size=3):
+        print("  running slots ", slots)
+    print("ntstore.idump(chunk_size=4), rows per chunk ", [len(rows) for rows in ntstore.idump(chunk_size=4)])
+    nl()
+    print("scan = ntstore.ireindex(chunk_size=2), run_steps(scan, budget_ms=5) per IO cycle")
+    scan = ntstore.ireindex(chunk_size=2)
+    done, last, cycles = False, None, 0
+    while not done:
+        done, last = run_steps(scan, 5, last)
+        cycles += 1    # an IOEngine run_cycle() would go here
+    print("cycles ", cycles, " index['bbb'] ", ntstore.index["bbb"])
+    print("ntstore.ifind_all('bbb', 'often', chunk_size=2), pop(0) after the first chunk")
+    popped = None
+    try:
+        for slots in ntstore.ifind_all("bbb", "often", chunk_size=2):
+            if popped is None:
+                popped = ntstore.pop(0)
+    except Exception as e:
+        print("Chunked scan error: ", e)
+    ntstore.append(list(popped))
+    nl()
+
+    print("=== Memory Report ===")
+    nl()
+
+    mreport = ntstore.memory_report()
+    print("ntstore.memory_report(), estimated bytes ")
+    for k, v in mreport.items():
+        print(k, v)
+    nl()
+
+    print("=== Streaming Import/Export ===")
+    nl()
+
+    import os
+    from lib.storeio import export_csv, import_csv, export_ndjson, import_ndjson
+
+    print("export_csv(ntstore, 'ntstore.csv', columns=['aaa', 'bbb']), rows ",
+          export_csv(ntstore, "ntstore.csv", columns=["aaa", "bbb"]))
+    print("export_ndjson(ntstore, 'often.ndjson', mask=ntstore.where('bbb', 'eq', 'often')), rows ",
+          export_ndjson(ntstore, "often.ndjson", mask=ntstore.where("bbb", "eq", "often")))
+    csvstore = TupleStore(nt_name="CSVTest", column_defs=["aaa", "bbb", "ccc", "ddd"],
+                          defaults=["default3", timestamp])
+    print("import_csv(csvstore, 'ntstore.csv', batch_size=4), defaults once per batch, rows ",
+          import_csv(csvstore, "ntstore.csv", batch_size=4))
+    print("distinct ddd timestamps ", len(set(csvstore.get_column("ddd"))))
+    print("import_ndjson(csvstore, 'often.ndjson'), rows ", import_ndjson(csvstore, "often.ndjson"))
+    print("csvstore.length ", csvstore.length)
+    for row in csvstore.get_rows(csvstore.where("bbb", "eq", "often")):
+        print(row)
+    os.remove("ntstore.csv")
+    os.remove("often.ndjson")
+    nl()
+
+    print("=== Change Data Capture Cursors ===")
+    nl()
+
+    print("ntstore.open_cursor('writer'), ntstore.open_cursor('display')")
+    ntstore.open_cursor("writer")
+    ntstore.open_cursor("display")
+    ntstore.set(1, "bbb", "rarely")
+    ntstore.pop(0)
+    nl()
+    print("ntstore.changes('writer') ")
+    for delta in ntstore.changes("writer"):
+        print(delta)
+    nl()
+    ntstore.append(("test10", "always", "rule-based", 10))
+    print("after append, ntstore.changes('writer') ")
+    for delta in ntstore.changes("writer"):
+        print(delta)
+    nl()
+    print("ntstore.changes('display'), independent of writer ")
+    for delta in ntstore.changes("display"):
+        print(delta)
+    nl()
     print("End of Test")
     nl()
 